@@ -3,6 +3,11 @@ ASGI config for ecommerce_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI lets the async auth views (login, registration,
+api-token-auth) wait on password hashing without tying up a worker, e.g.:
+
+    gunicorn ecommerce_api.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
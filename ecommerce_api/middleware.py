@@ -1,10 +1,27 @@
 """
 Custom middleware to exempt API endpoints from CSRF protection.
 This allows API calls from the frontend without CSRF token issues.
+
+ServerTimingMiddleware reports where a request's time went (SQL,
+serialization, rendering) in a Server-Timing header and the logs.
+MetricsMiddleware feeds the Prometheus counters served at /metrics.
+CompressionMiddleware gzip/Brotli-compresses API and HTML responses.
 """
 
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
+from products import compression, metrics, timing
+
+logger = logging.getLogger('products.timing')
+
 
 class DisableCSRFForAPI(MiddlewareMixin):
     """
@@ -18,3 +35,147 @@ class DisableCSRFForAPI(MiddlewareMixin):
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
 
+
+class ServerTimingMiddleware:
+    """
+    Per-request performance breakdown (see products/timing.py).
+
+    For a sampled share of requests (SERVER_TIMING_SAMPLE_RATE) it records
+    SQL count and time, the slowest statement, serializer, render and
+    compression time, and adds them as a Server-Timing header that browser dev tools display:
+
+        Server-Timing: db;dur=12.4;desc="7 queries", db-slowest;dur=5.1,
+                       serialize;dur=3.0, render;dur=0.8, compress;dur=0.4, total;dur=24.9
+
+    Each sampled request also logs one JSON line to 'products.timing'; one
+    slower than SERVER_TIMING_SLOW_MS is logged as a warning with its full
+    SQL trace. SQL text only ever goes to the log, never into the header.
+    With a sample rate of 0 the middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        self.rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if self.rate is None:
+            self.rate = 1.0 if settings.DEBUG else 0.0
+        self.slow = settings.SERVER_TIMING_SLOW_MS / 1000
+        if self.rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.rate < 1 and random.random() >= self.rate:
+            return self.get_response(request)
+
+        timings, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timing.QueryRecorder(timings, alias))
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        total = time.perf_counter() - timings.started
+        response['Server-Timing'] = self.header(timings, total)
+        self.log(request, response, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that separately
+        timings = timing.current()
+        if timings is not None:
+            started = time.perf_counter()
+            compressed = timings.phases.get('compress', 0.0)
+            # Render callbacks that ran first (the response cache storing
+            # compressed variants) already counted their compression
+            response.add_post_render_callback(lambda rendered: timings.add(
+                'render', time.perf_counter() - started - (timings.phases.get('compress', 0.0) - compressed),
+            ))
+        return response
+
+    def header(self, timings, total):
+        metrics = [f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"']
+        if timings.queries:
+            metrics.append(f'db-slowest;dur={timings.slowest[0] * 1000:.1f}')
+        for phase in ('serialize', 'render', 'compress'):
+            if phase in timings.phases:
+                metrics.append(f'{phase};dur={timings.phases[phase] * 1000:.1f}')
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def log(self, request, response, timings, total):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(timings.db * 1000, 2),
+            'queries': timings.queries,
+            'slowest_query_ms': round(timings.slowest[0] * 1000, 2),
+            'slowest_query': timings.slowest[1],
+            **{f'{phase}_ms': round(seconds * 1000, 2) for phase, seconds in timings.phases.items()},
+        }
+        if total < self.slow:
+            logger.info(json.dumps(record))
+            return
+        record['slow'] = True
+        record['sql'] = [
+            {'alias': alias, 'ms': round(duration * 1000, 2), 'sql': sql}
+            for alias, duration, sql in timings.trace
+        ]
+        logger.warning(json.dumps(record))
+
+
+class MetricsMiddleware:
+    """
+    Count every request for /metrics (see products/metrics.py): route,
+    method, status and duration, SQL statements per database alias, and the
+    cache lookups and authentication attempts recorded during the request.
+
+    Removed at startup when METRICS_ENABLED is false or prometheus_client is
+    not installed.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.available():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        state, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics.QueryCounter(state, alias)))
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        metrics.get_metrics().publish(
+            metrics.route_name(request), request.method, response.status_code,
+            time.perf_counter() - started, state,
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    gzip/Brotli for API and HTML responses (see products/compression.py):
+    negotiated from Accept-Encoding, above COMPRESSION_MIN_SIZE, streamed
+    exports compressed chunk by chunk. Responses that already carry a
+    Content-Encoding (cached catalog pages served from their stored
+    compressed variant) are passed through untouched.
+    """
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compression.compress_response(request, self.get_response(request))
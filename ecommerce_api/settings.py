@@ -9,6 +9,8 @@ Key configurations:
 - Installed Apps: Django REST Framework and django-filter for API functionality
 - Token Authentication: Added in Week 3 for secure API access
 - Environment Variables: Added in Week 4 for secure production deployment
+- Read replicas: optional, via DATABASE_REPLICA_URLS
+- Connection pooling: optional, via DATABASE_POOL
 """
 
 import os
@@ -61,6 +63,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ecommerce_api.middleware.ServerTimingMiddleware',  # First, so its total covers everything below
+    'ecommerce_api.middleware.MetricsMiddleware',  # Prometheus counters for /metrics
+    'ecommerce_api.middleware.CompressionMiddleware',  # gzip/Brotli, outside everything that sets the body
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Week 4: Serve static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -101,15 +106,43 @@ WSGI_APPLICATION = 'ecommerce_api.wsgi.application'
 
 import dj_database_url
 
+# Connection pooling (PostgreSQL only, needs psycopg 3 with the [pool] extra).
+# By default every worker thread keeps its own connection for 10 minutes and
+# health-checks it on each request. DATABASE_POOL=true switches to one pool
+# per process (Django 5.1+): requests borrow a connection and hand it back,
+# and a pool size bounds how many connections a process ever opens.
+# See products/pooling.py and `python manage.py benchmark_connections`.
+DATABASE_POOL = config('DATABASE_POOL', default=False, cast=bool)
+DATABASE_POOL_OPTIONS = {
+    'min_size': config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+    'max_size': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+    # Seconds a request waits for a free connection before failing
+    'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+    # Idle connections above min_size are closed after this many seconds
+    'max_idle': config('DATABASE_POOL_MAX_IDLE', default=300, cast=float),
+    # Connections are replaced after this long, so none lives forever
+    'max_lifetime': config('DATABASE_POOL_MAX_LIFETIME', default=3600, cast=float),
+}
+# Check each connection as it leaves the pool (one extra round trip)
+DATABASE_POOL_CHECKS = config('DATABASE_POOL_CHECKS', default=False, cast=bool)
+
+
+def database_from_url(url):
+    """DATABASES entry for a database URL, pooled when DATABASE_POOL is on."""
+    database = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    if DATABASE_POOL and database['ENGINE'] == 'django.db.backends.postgresql':
+        # The pool keeps connections itself; persistent connections must be off
+        database['CONN_MAX_AGE'] = 0
+        database['CONN_HEALTH_CHECKS'] = DATABASE_POOL_CHECKS
+        database.setdefault('OPTIONS', {})['pool'] = dict(DATABASE_POOL_OPTIONS)
+    return database
+
+
 # Check if we're in production (DATABASE_URL is set by Heroku)
 if config('DATABASE_URL', default=None):
     # Production: Use PostgreSQL database from environment variable
     DATABASES = {
-        'default': dj_database_url.config(
-            default=config('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
+        'default': database_from_url(config('DATABASE_URL')),
     }
 else:
     # Development: Use SQLite database (local file)
@@ -120,6 +153,129 @@ else:
         }
     }
 
+# Read replicas (optional): comma-separated database URLs, e.g.
+# DATABASE_REPLICA_URLS=postgres://replica-1/shop,postgres://replica-2/shop
+# Catalog reads are spread over them; writes and auth stay on 'default'
+# (see products/replicas.py). Tests mirror them onto the test database.
+DATABASE_REPLICAS = []
+for number, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = database_from_url(url)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['products.replicas.ReplicaRouter']
+
+
+# CACHE CONFIGURATION
+
+# Anonymous catalog reads are served from this cache (see products/cache.py).
+# Writes invalidate cached pages by bumping a catalog version stored in the
+# same cache, so every process that serves or writes the catalog must share it.
+# CACHE_BACKEND picks the store:
+# - locmem (default with DEBUG on): per-process memory, nothing to set up.
+#   Each process has its own version, so a write in one gunicorn worker, or
+#   from import_products/seed_catalog, leaves the other workers serving stale
+#   pages until CATALOG_CACHE_TIMEOUT. Only for runserver and tests
+# - file (default with DEBUG off): shared by every process on the machine,
+#   CACHE_LOCATION is a directory
+# - redis: shared by every machine, CACHE_LOCATION is a redis:// URL (a
+#   local Redis works fine); the one to use with several hosts
+# - dummy: no response cache at all
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'file')
+CACHE_LOCATIONS = {
+    'locmem': 'ecommerce-api',
+    'file': str(BASE_DIR / '.cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+    'dummy': '',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_LOCATIONS[CACHE_BACKEND]),
+    }
+}
+
+# Seconds a cached catalog response lives. Writes invalidate immediately by
+# bumping the catalog version, so this only bounds memory use.
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Lower edges of the price bands counted by /api/products/facets/ (the last band
+# is open-ended). Clients can pass their own with ?price_bands=0,50,100.
+PRODUCT_PRICE_BANDS = [0, 25, 50, 100, 250, 500, 1000]
+
+
+# Token authentication cache (products/authentication.py): how many tokens each
+# worker remembers and for how long. Logout/deactivation still take effect at once.
+TOKEN_CACHE_SIZE = config('TOKEN_CACHE_SIZE', default=10000, cast=int)
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=60, cast=int)
+
+# Threads per process that hash passwords for login/registration
+# (products/hashing.py). More logins than this simply wait for a free thread.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=4, cast=int)
+
+
+# Server-Timing instrumentation (ecommerce_api/middleware.py): share of
+# requests that get a Server-Timing header and a timing log line (0 turns the
+# middleware off entirely, 1 times every request), and the duration above
+# which a request's full SQL trace is logged. Unset, the rate is 1 when DEBUG
+# is on at startup and 0 otherwise (the test runner turns DEBUG off, so test
+# output stays quiet).
+SERVER_TIMING_SAMPLE_RATE = config(
+    'SERVER_TIMING_SAMPLE_RATE', default=None, cast=lambda rate: rate if rate is None else float(rate),
+)
+SERVER_TIMING_SLOW_MS = config('SERVER_TIMING_SLOW_MS', default=500, cast=float)
+
+# Timing lines are JSON, one per request, on stderr (the platform's log stream)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'products.timing': {
+            'handlers': ['console'],
+            'level': config('SERVER_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Frontend page (products/frontend.py): how long browsers and CDNs may reuse
+# the page (it only changes per deploy), whether it preloads the first
+# product page and the categories as one /bootstrap.json request, and how
+# long that catalog snapshot may be reused.
+FRONTEND_MAX_AGE = config('FRONTEND_MAX_AGE', default=86400, cast=int)
+FRONTEND_BOOTSTRAP = config('FRONTEND_BOOTSTRAP', default=True, cast=bool)
+FRONTEND_BOOTSTRAP_MAX_AGE = config('FRONTEND_BOOTSTRAP_MAX_AGE', default=10, cast=int)
+
+
+# Response compression (products/compression.py): gzip, or Brotli when the
+# brotli package is installed, for responses of at least COMPRESSION_MIN_SIZE
+# bytes whose client accepts it.
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+
+# Prometheus metrics (products/metrics.py): request, SQL, cache and auth
+# counters served at /metrics. On by default only with DEBUG on: route names,
+# traffic and error rates are not for the public. In production set
+# METRICS_ENABLED=true together with METRICS_TOKEN; scrapers then send
+# "Authorization: Bearer <token>" (`check --deploy` warns about an open
+# endpoint). Under gunicorn with several workers also set
+# PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py).
+METRICS_ENABLED = config('METRICS_ENABLED', default=DEBUG, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 
 # DJANGO REST FRAMEWORK CONFIGURATION
 
@@ -128,7 +284,7 @@ REST_FRAMEWORK = {
     # Token authentication is the primary method for API clients
     # Session auth removed to avoid CSRF issues with API endpoints
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',    # Week 3: Token auth for API clients
+        'products.authentication.CachedTokenAuthentication',    # Week 3: Token auth (cached lookups)
         'rest_framework.authentication.BasicAuthentication',    # For simple testing
     ],
     
@@ -145,7 +301,19 @@ REST_FRAMEWORK = {
     
     # Week 2: Pagination to limit results per page
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 12  # Return 12 items per page
+    'PAGE_SIZE': 12,  # Return 12 items per page
+
+    # JSON encoded/decoded by orjson when installed, same output as DRF's
+    # JSONRenderer/JSONParser (products/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'products.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'products.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 
@@ -0,0 +1,81 @@
+"""
+Slim settings for the Vercel serverless entry point (api/index.py)
+------------------------------------------------------------------
+Every cold start pays for whatever Django loads before the first response.
+The API and the frontend page don't need the admin, sessions, flash
+messages, the static files app, WhiteNoise or DRF's browsable API, so this
+profile starts from settings.py and leaves them out:
+
+- INSTALLED_APPS: no admin (its autodiscovery imports every admin.py and the
+  auth forms), sessions, messages or staticfiles
+- MIDDLEWARE: no WhiteNoise (it walks STATIC_ROOT and reads the manifest at
+  startup), sessions, auth or messages - the API authenticates with tokens
+- REST_FRAMEWORK: JSON only, so the browsable API's templates are never loaded
+- /admin/ and /api-auth/ are not routed (ecommerce_api/urls.py)
+- METRICS_ENABLED is off: each instance would only count its own requests,
+  and prometheus_client is never imported
+- CACHE_BACKEND defaults to dummy: instances share neither memory nor disk
+  (and only /tmp is writable), so a per-instance cache would keep serving
+  pages another instance's write changed. Lists and /bootstrap.json then
+  carry no ETag (cache.py). Set CACHE_BACKEND=redis to cache and revalidate
+- TOKEN_CACHE_TTL is 0 unless CACHE_BACKEND is redis: a logout or
+  deactivation reaches other warm instances only through the revocation
+  generation in a shared cache (authentication.py), so without one a
+  revoked token would keep working elsewhere for the whole TTL
+
+Nothing here changes what the API returns. Compare startup with:
+
+    python manage.py benchmark_startup
+"""
+
+from decouple import config
+
+from .settings import *  # noqa: F401,F403
+from .settings import (
+    CACHE_BACKENDS, CACHE_LOCATIONS, INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES, TOKEN_CACHE_TTL,
+)
+
+SERVERLESS_DROPPED_APPS = {
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+}
+SERVERLESS_DROPPED_MIDDLEWARE = {
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SERVERLESS_DROPPED_APPS]
+MIDDLEWARE = [name for name in MIDDLEWARE if name not in SERVERLESS_DROPPED_MIDDLEWARE]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['products.renderers.FastJSONRenderer'],
+}
+
+METRICS_ENABLED = False
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='dummy')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_LOCATIONS[CACHE_BACKEND]),
+    }
+}
+
+# Only a cache every instance shares can carry token revocations
+TOKEN_CACHE_TTL = TOKEN_CACHE_TTL if CACHE_BACKEND == 'redis' else 0
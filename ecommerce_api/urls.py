@@ -8,27 +8,40 @@ URL Structure:
 - /api/            -> All API endpoints (products, users, categories)
 - /api/api-token-auth/  -> Week 3: Token authentication endpoint
 - /api-auth/       -> DRF browsable API login/logout
+- /bootstrap.json  -> data for the frontend's first paint (products/frontend.py)
+- /metrics         -> Prometheus metrics (products/metrics.py)
+
+The admin and browsable API login are only routed when their apps are
+installed (the serverless profile, settings_serverless.py, leaves them out).
 """
 
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
-from rest_framework.authtoken.views import obtain_auth_token
-from products.views import index_view
+from products.views import bootstrap_view, index_view, metrics_view, obtain_auth_token
 
 urlpatterns = [
     # Frontend UI - serve at root
     path('', index_view, name='index'),
-    
-    # Django admin panel
-    path('admin/', admin.site.urls),
+    path('bootstrap.json', bootstrap_view, name='frontend-bootstrap'),
     
     # All API endpoints from the products app
     path('api/', include('products.urls')),
     
     # Week 3: Token authentication endpoint
     # POST username and password to get an auth token
+    # (async version of DRF's view, hashing runs off the request thread)
     path('api/api-token-auth/', obtain_auth_token, name='api_token_auth'),
-    
-    # DRF browsable API login/logout (for browser testing)
-    path('api-auth/', include('rest_framework.urls')),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    # Django admin panel
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if apps.is_installed('django.contrib.sessions'):
+    # DRF browsable API login/logout (for browser testing)
+    urlpatterns.append(path('api-auth/', include('rest_framework.urls')))
@@ -0,0 +1,27 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this directory
+(Procfile: gunicorn ecommerce_api.wsgi).
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to files
+in that directory and /metrics adds them up (products/metrics.py). Files
+left by an earlier run would be counted again, so the directory is emptied
+when the master starts, and an exited worker's files are marked dead.
+"""
+
+import os
+import shutil
+
+multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -40,7 +40,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'price', 'stock_quantity', 'created_by', 'created_at']
     list_filter = ['category', 'created_at']  # Filter sidebar
     search_fields = ['name', 'description']   # Search box
-    readonly_fields = ['created_at']          # Can't edit timestamp
+    readonly_fields = ['created_at', 'updated_at']  # Can't edit timestamps
     
     # Organize form into logical sections
     fieldsets = (
@@ -51,7 +51,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('price', 'category', 'stock_quantity')
         }),
         ('Metadata', {
-            'fields': ('created_by', 'created_at'),
+            'fields': ('created_by', 'created_at', 'updated_at'),
             'classes': ('collapse',)  # Collapsible section
         }),
     )
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        # Register cache invalidation and post-migrate handlers, the
+        # per-request replica routing reset and the system checks
+        from . import checks, replicas, signals  # noqa: F401
@@ -0,0 +1,133 @@
+"""
+Cached token authentication
+---------------------------
+TokenAuthentication runs a Token JOIN User query on every authenticated
+request before the view starts. CachedTokenAuthentication keeps recently
+seen tokens in a small in-process LRU cache with a TTL, so repeat requests
+from the same client skip that query.
+
+Revocation stays immediate:
+- logging out (Token deleted), deleting a user, or deactivating one evicts
+  the affected entries in this process (signals.py)
+- the same events bump a revocation generation in Django's cache; entries
+  filled under an older generation are treated as misses, so other worker
+  processes drop them too when CACHES is shared (file/redis). With the
+  default locmem cache each process only sees its own revocations and the
+  TTL bounds how long another process can keep a revoked token. The
+  serverless profile has no shared cache by default (DummyCache), so it
+  turns the token cache off rather than let instances miss revocations.
+
+token_cache.stats() returns hit/miss/eviction counters.
+
+Settings: TOKEN_CACHE_SIZE (entries, default 10000) and TOKEN_CACHE_TTL
+(seconds, default 60; 0 disables the cache).
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import metrics
+
+REVOCATION_KEY = 'auth:token-revocations'
+
+
+def revocation_generation():
+    return cache.get(REVOCATION_KEY, 0)
+
+
+def bump_revocation_generation():
+    try:
+        cache.incr(REVOCATION_KEY)
+    except ValueError:
+        cache.add(REVOCATION_KEY, 1, timeout=None)
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> (user, token) with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires, generation, user, token)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        if not self.ttl:
+            return None
+        generation = revocation_generation()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic() or entry[1] != generation:
+                if entry is not None:
+                    del self.entries[key]
+                self.counters['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[2], entry[3]
+
+    def set(self, key, user, token):
+        if not self.ttl:
+            return
+        entry = (time.monotonic() + self.ttl, revocation_generation(), user, token)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate_key(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.counters['invalidations'] += 1
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            stale = [key for key, entry in self.entries.items() if entry[2].pk == user_id]
+            for key in stale:
+                del self.entries[key]
+            self.counters['invalidations'] += len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'size': len(self.entries)}
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication backed by token_cache. Same header, same errors."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        metrics.record_cache('token', cached is not None)
+        if cached is None:
+            try:
+                user, token = super().authenticate_credentials(key)
+            except AuthenticationFailed:
+                metrics.record_auth('token', False)
+                raise
+            token_cache.set(key, user, token)
+        else:
+            user, token = cached
+        metrics.record_auth('token', True)
+        # Each request gets its own copy so per-request state (e.g. the cached
+        # user.auth_token relation) never leaks between requests or threads
+        return copy.copy(user), token
@@ -0,0 +1,204 @@
+"""
+Bulk product writes
+-------------------
+The nightly price/stock sync used to send one HTTP request per product, and
+each create ran its own category lookup and single-row transaction.
+/api/products/bulk/ takes a whole list per request instead:
+
+- POST   [{product}, ...]              -> create
+- PATCH  [{"id": 1, "price": ...}, ...] -> partial update
+- DELETE [1, 2, 3]  (or {"ids": [...]}) -> delete
+
+Every item is validated with ProductSerializer, category_ids are checked
+with one query (per chunk for updates) instead of one per item, and rows are
+written with bulk_create/bulk_update in transactions of CHUNK_SIZE items. An invalid item only fails itself: it is
+reported by its index in the request and the rest of the batch still goes
+through. If a chunk's bulk write hits a database error, that chunk is
+retried row by row so only the offending items fail.
+
+bulk_create/bulk_update send no model signals, so the catalog cache version
+is bumped explicitly once the batch is written (see cache.py).
+"""
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_catalog_version
+from .models import Category, Product
+from .serializers import ProductSerializer
+
+CHUNK_SIZE = 500
+
+# Largest batch accepted in one request
+MAX_ITEMS = 5000
+
+
+def chunked(items, size=None):
+    size = size or CHUNK_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def missing_category_errors(pending):
+    """
+    Check the category_id of every (index, data) pair with one query.
+    Returns {index: errors} for items pointing at a category that doesn't exist.
+    """
+    wanted = {data['category_id'] for _, data in pending if 'category_id' in data}
+    existing = set(Category.objects.filter(pk__in=wanted).values_list('pk', flat=True)) if wanted else set()
+    return {
+        index: {'category_id': [f'Invalid pk "{data["category_id"]}" - object does not exist.']}
+        for index, data in pending
+        if 'category_id' in data and data['category_id'] not in existing
+    }
+
+
+def write_chunk(chunk, bulk_write, single_write):
+    """
+    Write [(index, obj)] in one transaction; on a database error fall back to
+    one savepoint per row. Returns {index: errors} for rows that failed.
+    """
+    try:
+        with transaction.atomic():
+            bulk_write([obj for _, obj in chunk])
+        return {}
+    except DatabaseError:
+        pass
+    errors = {}
+    for index, obj in chunk:
+        try:
+            with transaction.atomic():
+                single_write(obj)
+        except DatabaseError as error:
+            errors[index] = {'non_field_errors': [str(error)]}
+    return errors
+
+
+def create_products(items, user, context=None):
+    """Validate and insert new products. Returns ({index: id}, {index: errors})."""
+    serializer = ProductSerializer(data=items, many=True, context=context or {})
+    pending, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            pending.append((index, serializer.child.run_validation(item)))
+        except ValidationError as error:
+            errors[index] = error.detail
+
+    errors.update(missing_category_errors(pending))
+    rows = [
+        (index, Product(**data, created_by=user))
+        for index, data in pending
+        if index not in errors
+    ]
+    for chunk in chunked(rows):
+        errors.update(write_chunk(chunk, Product.objects.bulk_create, lambda obj: obj.save()))
+
+    created = {index: obj.pk for index, obj in rows if index not in errors}
+    if created:
+        bump_catalog_version()
+    return created, errors
+
+
+def is_id(value):
+    """A JSON integer; true/false are ints to Python but never product ids."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def update_products(items, context=None):
+    """Validate and apply partial updates. Returns ({index: id}, {index: errors})."""
+    errors = {}
+    targets = []  # (index, id, item)
+    for index, item in enumerate(items):
+        pk = item.get('id') if isinstance(item, dict) else None
+        if not is_id(pk):
+            errors[index] = {'id': ['A product id is required.']}
+        else:
+            targets.append((index, pk, item))
+
+    updated = {}
+    for chunk in chunked(targets):
+        with transaction.atomic():
+            # Lock the chunk's rows so concurrent writers can't interleave
+            # between validation and the UPDATE (a no-op on SQLite)
+            instances = Product.objects.select_for_update().in_bulk([pk for _, pk, _ in chunk])
+            pending, fields = [], set()
+            for index, pk, item in chunk:
+                instance = instances.get(pk)
+                if instance is None:
+                    errors[index] = {'id': [f'Product {pk} does not exist.']}
+                    continue
+                serializer = ProductSerializer(instance, data=item, partial=True, context=context or {})
+                if not serializer.is_valid():
+                    errors[index] = serializer.errors
+                    continue
+                pending.append((index, serializer.validated_data))
+
+            chunk_errors = missing_category_errors(pending)
+            errors.update(chunk_errors)
+            rows = []
+            now = timezone.now()
+            for index, data in pending:
+                if index in chunk_errors:
+                    continue
+                instance = instances[items[index]['id']]
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                # bulk_update() skips auto_now, so updated_at is set by hand
+                instance.updated_at = now
+                fields.update(data)
+                rows.append((index, instance))
+            if not rows:
+                continue
+
+            fields = sorted(fields | {'updated_at'})
+            errors.update(write_chunk(
+                rows,
+                lambda objs: Product.objects.bulk_update(objs, fields),
+                lambda obj: obj.save(update_fields=fields),
+            ))
+            updated.update({index: obj.pk for index, obj in rows if index not in errors})
+
+    if updated:
+        bump_catalog_version()
+    return updated, errors
+
+
+def delete_products(ids):
+    """Delete products by id. Returns ({index: id}, {index: errors})."""
+    errors, targets = {}, []
+    for index, pk in enumerate(ids):
+        if is_id(pk):
+            targets.append((index, pk))
+        else:
+            errors[index] = {'id': ['A product id is required.']}
+
+    deleted = {}
+    for chunk in chunked(targets):
+        with transaction.atomic():
+            existing = set(
+                Product.objects.filter(pk__in=[pk for _, pk in chunk]).order_by().values_list('pk', flat=True)
+            )
+            Product.objects.filter(pk__in=existing).delete()
+        for index, pk in chunk:
+            if pk in existing:
+                deleted[index] = pk
+            else:
+                errors[index] = {'id': [f'Product {pk} does not exist.']}
+
+    if deleted:
+        bump_catalog_version()
+    return deleted, errors
+
+
+def bulk_report(succeeded, errors, status_name):
+    """Per-item results in request order, plus totals."""
+    results = [
+        {'index': index, 'status': status_name, 'id': pk}
+        for index, pk in succeeded.items()
+    ] + [
+        {'index': index, 'status': 'error', 'errors': detail}
+        for index, detail in errors.items()
+    ]
+    results.sort(key=lambda result: result['index'])
+    return {'succeeded': len(succeeded), 'failed': len(errors), 'results': results}
@@ -0,0 +1,161 @@
+"""
+Versioned response cache for catalog reads
+------------------------------------------
+Anonymous GETs on products and categories are most of our traffic, and each
+one used to re-run the ORM queries and DRF serialization. CachedResponseMixin
+stores the rendered response body in Django's cache (settings.CACHES) and
+serves repeats straight from it.
+
+Invalidation is by version, not by deleting keys:
+- every cache key embeds the current catalog version
+- Product/Category saves and deletes (signals.py) bump the version
+- the next read therefore misses and re-renders; stale entries are never
+  read again and simply expire after CATALOG_CACHE_TIMEOUT
+
+Code that writes without model signals (QuerySet.update(), bulk_create())
+must call bump_catalog_version() itself.
+
+The version lives in the cache, so it is only shared by the processes that
+share the cache. With LocMemCache every process has its own: a write in one
+gunicorn worker, or from import_products/seed_catalog, bumps only that
+process's version and the other workers keep serving their cached pages
+until CATALOG_CACHE_TIMEOUT. That is why locmem is only the default with
+DEBUG on and `manage.py check --deploy` warns about it (checks.py).
+Deployments use the file cache (one machine) or Redis (several).
+
+With DummyCache (the serverless default) nothing is stored, not even the
+version: catalog_version() returns None, nothing is cached, and lists and
+/bootstrap.json go out without an ETag rather than with one that either
+changes on every request or never changes at all.
+
+Entries also hold the body's gzip/Brotli variants (compression.py), made
+once when the entry is stored, so hits are served compressed without
+compressing again.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date
+
+from . import metrics
+from .compression import apply_variant, compressed_variants
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    """
+    Return the current catalog version, starting one if the key is missing.
+
+    Returns None if the cache can't keep it (DummyCache): no version could
+    be bumped either, so there is nothing to validate against.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # First use or evicted: start from the clock so the new version can't
+        # collide with entries written under an earlier one
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response by moving to a new version."""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Missing key: any fresh clock-based version is newer than what
+        # readers may have used (with DummyCache there is nothing to do)
+        version = time.time_ns()
+        cache.add(CATALOG_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def normalized_query(request):
+    """The query string with parameters sorted, so ?a=1&b=2 and ?b=2&a=1 share a key."""
+    return urlencode(sorted((k, v) for k, values in request.GET.lists() for v in values))
+
+
+def response_cache_key(request, version=None):
+    version = catalog_version() if version is None else version
+    raw = '|'.join([
+        request.path,
+        normalized_query(request),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    # 'body' rather than the old 'response': entries now hold compressed
+    # variants, and a shared cache may still have entries in the old shape
+    return f'catalog:v{version}:body:{digest}'
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin that caches rendered responses for anonymous GETs.
+
+    Only the actions listed in cached_actions are cached, only 200 responses
+    are stored, and any request carrying credentials skips the cache entirely.
+    Responses carry X-Cache: HIT or MISS. ETag/Last-Modified are stored with
+    the body, so hits can still answer 304 (see conditional.py).
+    """
+    cached_actions = ('list', 'retrieve')
+    # Vary (DRF's Accept) and Allow too, so a HIT carries the MISS's headers
+    stored_headers = ('Content-Type', 'ETag', 'Last-Modified', 'Vary', 'Allow')
+
+    def is_cacheable(self, request):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        return (
+            request.method == 'GET'
+            and action in self.cached_actions
+            and 'HTTP_AUTHORIZATION' not in request.META
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        version = catalog_version() if self.is_cacheable(request) else None
+        if version is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(request, version)
+        cached = cache.get(key)
+        metrics.record_cache('response', cached is not None)
+        if cached is not None:
+            content, headers, variants = cached
+            # Validators stored with the entry are current for this catalog
+            # version, so a matching client gets its 304 without any query
+            last_modified = headers.get('Last-Modified')
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=last_modified and parse_http_date(last_modified),
+            )
+            if response is None:
+                response = apply_variant(request, HttpResponse(content, headers=headers), variants)
+            else:
+                for name in ('ETag', 'Last-Modified', 'Vary'):
+                    if name in headers:
+                        response[name] = headers[name]
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda rendered: self.store(request, key, rendered))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def store(self, request, key, response):
+        headers = {
+            name: response[name]
+            for name in self.stored_headers
+            if response.has_header(name)
+        }
+        variants = compressed_variants(response.content)
+        cache.set(key, (response.content, headers, variants), timeout=settings.CATALOG_CACHE_TIMEOUT)
+        # This response can use a stored variant too
+        apply_variant(request, response, variants)
@@ -0,0 +1,51 @@
+"""
+Deployment checks
+-----------------
+Run by `manage.py check --deploy` along with Django's own production checks.
+
+- products.W001: the default cache is per-process LocMemCache or
+  DummyCache. With LocMemCache the catalog version that invalidates cached
+  pages (cache.py) is per-process as well, so writes in one worker or
+  management command leave the others serving stale catalog pages. With
+  DummyCache nothing is cached and lists carry no ETag, so every catalog
+  request hits the database and no client ever gets a 304.
+- products.W002: /metrics is enabled without METRICS_TOKEN, so anyone can
+  read the route, traffic and error counters.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+UNSHARED_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache': (
+        'The default cache is per-process LocMemCache, so catalog writes only '
+        'invalidate cached responses in the process that made them.'
+    ),
+    'django.core.cache.backends.dummy.DummyCache': (
+        'The default cache is DummyCache, so catalog responses are never cached '
+        'and lists and /bootstrap.json carry no ETag to revalidate.'
+    ),
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_catalog_cache(app_configs, **kwargs):
+    message = UNSHARED_CACHES.get(settings.CACHES.get('default', {}).get('BACKEND'))
+    if message is None:
+        return []
+    return [Warning(
+        message,
+        hint='Set CACHE_BACKEND=file (one machine) or CACHE_BACKEND=redis (several).',
+        id='products.W001',
+    )]
+
+
+@register(Tags.security, deploy=True)
+def check_metrics_token(app_configs, **kwargs):
+    if not settings.METRICS_ENABLED or settings.METRICS_TOKEN:
+        return []
+    return [Warning(
+        '/metrics is enabled and answers anyone.',
+        hint='Set METRICS_TOKEN, or METRICS_ENABLED=false.',
+        id='products.W002',
+    )]
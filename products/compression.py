@@ -0,0 +1,163 @@
+"""
+Response compression
+--------------------
+Product lists, search results and the export are verbose JSON (or CSV /
+NDJSON), and the frontend page is a 27 KB HTML document; WhiteNoise only
+compresses files under STATIC_ROOT. ecommerce_api.middleware
+.CompressionMiddleware compresses the rest:
+
+- the encoding is negotiated from Accept-Encoding: Brotli (br) when the
+  brotli package is installed and the client accepts it, otherwise gzip
+- only GET/HEAD responses of text-like types (JSON, NDJSON, CSV, HTML...)
+  of at least COMPRESSION_MIN_SIZE bytes; tiny bodies don't get smaller and
+  responses to POSTs (login, registration) carry secrets next to what the
+  client sent, the setup BREACH-style attacks need
+- streamed responses (the export) are compressed chunk by chunk
+- strong ETags become weak, since the bytes on the wire now differ
+
+Cached catalog responses (cache.py) are stored with their compressed
+variants already made, a little tighter than on the fly, so a cache hit
+only picks the right variant. Compression time shows
+up as the 'compress' phase of the Server-Timing header (timing.py).
+"""
+
+import gzip
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+from .timing import measure
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Preference order when the client accepts several
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml',
+)
+
+# Per response on the fly vs once per cache entry. Brotli above 5 costs
+# several times the CPU for a few percent on a product page.
+LEVELS = {'gzip': 6, 'br': 4}
+CACHED_LEVELS = {'gzip': 9, 'br': 5}
+
+
+def accepted_encoding(request):
+    """The preferred encoding in ENCODINGS the client accepts, or None."""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not header:
+        return None
+    qualities = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    wildcard = qualities.get('*', 0.0)
+    accepted = [
+        (qualities.get(encoding, wildcard), -rank, encoding)
+        for rank, encoding in enumerate(ENCODINGS)
+        if qualities.get(encoding, wildcard) > 0
+    ]
+    return max(accepted)[2] if accepted else None
+
+
+def compress(content, encoding, levels=LEVELS):
+    if encoding == 'br':
+        return brotli.compress(content, quality=levels['br'])
+    # mtime=0 so equal bodies compress to equal bytes
+    return gzip.compress(content, compresslevel=levels['gzip'], mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks, flushing after each so streaming continues."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=LEVELS['br'])
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(LEVELS['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def is_compressible(request, response):
+    """Whether this response should vary by, and be sent with, a Content-Encoding."""
+    content_type = response.get('Content-Type', '')
+    return (
+        settings.COMPRESSION_ENABLED
+        and request.method in ('GET', 'HEAD')
+        and not response.has_header('Content-Encoding')
+        and not isinstance(response, FileResponse)
+        and not getattr(response, 'is_async', False)
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def compressed_variants(content):
+    """{encoding: body} for a cache entry, empty when the body is below the threshold."""
+    if not settings.COMPRESSION_ENABLED or len(content) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    with measure('compress'):
+        return {encoding: compress(content, encoding, CACHED_LEVELS) for encoding in ENCODINGS}
+
+
+def mark_encoded(response, encoding):
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def use_body(response, encoding, body):
+    response.content = body
+    response['Content-Length'] = str(len(body))
+    mark_encoded(response, encoding)
+
+
+def apply_variant(request, response, variants):
+    """Send the compressed variant of a cached body the client accepts, if any."""
+    if not is_compressible(request, response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = accepted_encoding(request)
+    if encoding in variants:
+        use_body(response, encoding, variants[encoding])
+    return response
+
+
+def compress_response(request, response):
+    """Compress a response on the fly (CompressionMiddleware)."""
+    if not is_compressible(request, response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        response.streaming_content = compress_stream(response.streaming_content, encoding)
+        del response['Content-Length']
+        mark_encoded(response, encoding)
+        return response
+
+    if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+        return response
+    with measure('compress'):
+        body = compress(response.content, encoding)
+    if len(body) < len(response.content):
+        use_body(response, encoding, body)
+    return response
@@ -0,0 +1,90 @@
+"""
+Conditional GET for catalog resources
+-------------------------------------
+Clients and the CDN used to re-download full payloads on every visit because
+responses carried no validators. ConditionalGetMixin adds ETag and
+Last-Modified to list and detail responses and answers If-None-Match /
+If-Modified-Since with a bodyless 304.
+
+A list's ETag comes from the catalog version (cache.py), read from the
+cache without touching the database. Every product or category save or
+delete, bulk write, reservation and creator rename bumps it, so the tag
+moves on edits, additions, deletions and renames alike, and revalidating a
+page costs no query at all. The version is not a time, so lists carry no
+Last-Modified; an If-Modified-Since check could not see deletions anyway.
+With a cache that keeps no version (DummyCache) lists carry no ETag.
+
+A detail's validators are read off the fetched object: its updated_at and
+the related category's, which covers the nested category data. Values shown
+in the body that carry no timestamp of their own (the creator's username)
+go into the ETag as they are, so a rename changes the tag; Last-Modified
+can't see them, but If-None-Match takes precedence where both are sent.
+"""
+
+import hashlib
+from operator import attrgetter
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .cache import catalog_version, normalized_query
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin for ETag / Last-Modified / 304 on list and retrieve.
+
+    validator_fields are the timestamps that change whenever a single object's
+    serialized representation changes (the model's own updated_at plus any
+    nested data). validator_values are other serialized values with no
+    timestamp of their own; they only feed the ETag. Lists are validated by
+    the catalog version instead.
+    """
+    validator_fields = ('updated_at',)
+    validator_values = ()
+
+    def list(self, request, *args, **kwargs):
+        version = catalog_version()
+        if version is None:
+            # No shared version (DummyCache), so nothing to tag the page with
+            return super().list(request, *args, **kwargs)
+        return self.conditional(
+            request, [], [version],
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        # The object has to be loaded anyway; its timestamps are the validators
+        instance = self.get_object()
+        timestamps = [attrgetter(field.replace('__', '.'))(instance) for field in self.validator_fields]
+        values = [attrgetter(field.replace('__', '.'))(instance) for field in self.validator_values]
+        return self.conditional(
+            request, timestamps, values,
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+    def conditional(self, request, timestamps, extra, render):
+        """Answer 304 if the client's validators match, otherwise render; tag either response."""
+        known = [value for value in timestamps if value is not None]
+        last_modified = int(max(known).timestamp()) if known else None
+        etag = self.make_etag(request, timestamps + extra)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def make_etag(self, request, parts):
+        # The same data renders differently per page, ordering and format,
+        # so the query string and Accept header are part of the tag
+        raw = '|'.join([
+            request.path,
+            normalized_query(request),
+            request.META.get('HTTP_ACCEPT', ''),
+            *(value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in parts),
+        ])
+        return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
@@ -0,0 +1,125 @@
+"""
+Facet counts for filter sidebars
+--------------------------------
+A filter sidebar needs, for the products currently matched, how many fall in
+each category, each price band and in/out of stock. Counting those one
+category at a time is a query per facet value; /api/products/facets/ does it
+in one:
+
+    SELECT category_id, category.name, category.slug,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE price >= 0 AND price < 25),   -- one per band
+           ...,
+           COUNT(*) FILTER (WHERE stock_quantity > 0)
+    FROM products ... WHERE <the request's filters and search>
+    GROUP BY category
+
+Per-category rows come straight from the GROUP BY; the band and stock
+columns are summed across them in Python. (SQLite and older databases get
+the same thing as SUM(CASE ...) - Django writes that for us.)
+
+Results are cached under the catalog version (cache.py), so any product or
+category change invalidates them and a repeat sidebar costs no query at all.
+
+Price bands come from settings.PRODUCT_PRICE_BANDS or ?price_bands=0,50,100:
+ascending lower edges, the last band is open-ended.
+"""
+
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework.exceptions import ParseError
+
+from . import metrics
+from .cache import catalog_version, normalized_query
+
+DEFAULT_PRICE_BANDS = (0, 25, 50, 100, 250, 500, 1000)
+
+# More edges than this would make the aggregate needlessly wide
+MAX_PRICE_BANDS = 20
+
+
+def price_bands(request):
+    """Band edges from ?price_bands= or settings, as ascending Decimals."""
+    raw = request.query_params.get('price_bands')
+    if raw is None:
+        edges = getattr(settings, 'PRODUCT_PRICE_BANDS', DEFAULT_PRICE_BANDS)
+    else:
+        edges = [edge for edge in raw.split(',') if edge.strip()]
+    try:
+        edges = [Decimal(str(edge).strip()) for edge in edges]
+    except InvalidOperation:
+        raise ParseError('price_bands must be comma-separated numbers.')
+    if not edges or len(edges) > MAX_PRICE_BANDS:
+        raise ParseError(f'price_bands needs between 1 and {MAX_PRICE_BANDS} edges.')
+    if any(not edge.is_finite() for edge in edges) or edges != sorted(set(edges)):
+        raise ParseError('price_bands must be strictly ascending.')
+    return edges
+
+
+def band_conditions(edges):
+    """One Q per band: [edge_i, edge_i+1), and the last one open-ended."""
+    conditions = []
+    for low, high in zip(edges, list(edges[1:]) + [None]):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        conditions.append(condition)
+    return conditions
+
+
+def facet_counts(queryset, edges):
+    """Run the single facet aggregate over a filtered Product queryset."""
+    bands = band_conditions(edges)
+    aggregates = {'total': Count('pk'), 'in_stock': Count('pk', filter=Q(stock_quantity__gt=0))}
+    aggregates.update({f'band_{i}': Count('pk', filter=condition) for i, condition in enumerate(bands)})
+    rows = list(
+        queryset
+        .order_by()  # an ORDER BY column would end up in the GROUP BY
+        .values('category_id', 'category__name', 'category__slug')
+        .annotate(**aggregates)
+    )
+
+    total = sum(row['total'] for row in rows)
+    in_stock = sum(row['in_stock'] for row in rows)
+    highs = [str(edge) for edge in edges[1:]] + [None]
+    return {
+        'count': total,
+        'categories': sorted(
+            (
+                {
+                    'id': row['category_id'],
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                    'count': row['total'],
+                }
+                for row in rows
+            ),
+            key=lambda category: (-category['count'], category['name']),
+        ),
+        'price_bands': [
+            {'min': str(low), 'max': high, 'count': sum(row[f'band_{i}'] for row in rows)}
+            for i, (low, high) in enumerate(zip(edges, highs))
+        ],
+        'stock': {'in_stock': in_stock, 'out_of_stock': total - in_stock},
+    }
+
+
+def cached_facet_counts(request, queryset):
+    """facet_counts() for this request, cached until the catalog changes."""
+    edges = price_bands(request)
+    version = catalog_version()
+    if version is None:
+        return facet_counts(queryset, edges)
+    raw = '|'.join([request.path, normalized_query(request)])
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    key = f'catalog:v{version}:facets:{digest}'
+    data = cache.get(key)
+    metrics.record_cache('facets', data is not None)
+    if data is None:
+        data = facet_counts(queryset, edges)
+        cache.set(key, data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return data
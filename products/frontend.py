@@ -0,0 +1,165 @@
+"""
+Precompiled frontend shell
+--------------------------
+index_view used to run the template engine over templates/index.html on
+every visit, and the page then fetched /api/products/?page=1 and
+/api/categories/ before it could show anything - three round trips.
+
+- the template is rendered once per process (per deploy; api/index.py does
+  it while a serverless instance starts) and identified by a hash of its
+  content. The page holds no per-request or catalog data, so it is sent with
+  that hash as its ETag and cached for FRONTEND_MAX_AGE seconds (a day by
+  default), then served stale while it revalidates; a revalidation is an
+  empty 304 until the next deploy
+- with FRONTEND_BOOTSTRAP on, the first product page and the category list
+  come from one short-lived fragment, /bootstrap.json, which the page
+  preloads: exactly the bodies the API returns for those URLs. It is cached
+  with its gzip/Brotli variants per catalog version (cache.py), tagged with
+  that version, and may be reused for FRONTEND_BOOTSTRAP_MAX_AGE seconds
+  (with DummyCache there is no version: no ETag, rebuilt every request).
+  First paint needs the (usually cached) page and one request
+
+With DEBUG on the template is re-read on every request, so edits show up.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, QueryDict
+from django.template.loader import render_to_string
+from django.urls import resolve, reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .cache import catalog_version
+from .compression import apply_variant, compressed_variants
+
+BOOTSTRAP_MARKER = '<!-- bootstrap -->'
+
+# API requests combined into /bootstrap.json: (key, path, query string)
+BOOTSTRAP_REQUESTS = (
+    ('products', '/api/products/', 'page=1'),
+    ('categories', '/api/categories/', ''),
+)
+
+
+class Shell:
+    """The rendered index.html, a short hash of it and its compressed variants."""
+
+    def __init__(self, html):
+        self.body = html.encode()
+        self.hash = hashlib.sha256(self.body).hexdigest()[:16]
+        # Compressed variants, made on first use
+        self.variants = None
+
+
+_shells = {}
+_shell_lock = threading.Lock()
+
+
+def render_shell():
+    html = render_to_string('index.html')
+    link = ''
+    if settings.FRONTEND_BOOTSTRAP:
+        link = (
+            f'<link id="bootstrap-link" rel="preload" as="fetch" crossorigin="anonymous" '
+            f'href="{reverse("frontend-bootstrap")}">'
+        )
+    return Shell(html.replace(BOOTSTRAP_MARKER, link))
+
+
+def compiled_shell():
+    """Render templates/index.html once per process (every time with DEBUG on)."""
+    if settings.DEBUG:
+        return render_shell()
+    key = settings.FRONTEND_BOOTSTRAP
+    if key not in _shells:
+        with _shell_lock:
+            if key not in _shells:
+                _shells[key] = render_shell()
+    return _shells[key]
+
+
+def internal_get(request, path, query):
+    """
+    The body of an anonymous JSON GET to an API route, answered in-process
+    (through the same view, so the response cache is shared), or None if it
+    isn't a 200.
+    """
+    internal = HttpRequest()
+    internal.method = 'GET'
+    internal.path = internal.path_info = path
+    internal.META = {
+        key: value for key, value in request.META.items()
+        if key in ('SERVER_NAME', 'SERVER_PORT', 'HTTP_HOST', 'wsgi.url_scheme')
+        or key == (settings.SECURE_PROXY_SSL_HEADER or (None,))[0]
+    }
+    internal.META.update({'REQUEST_METHOD': 'GET', 'QUERY_STRING': query, 'HTTP_ACCEPT': 'application/json'})
+    internal.GET = QueryDict(query)
+    match = resolve(path)
+    internal.resolver_match = match
+    response = match.func(internal, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content if response.status_code == 200 else None
+
+
+def bootstrap_body(request, version):
+    """The combined API responses as one JSON object, or None if one failed."""
+    parts = [b'{"version":%d' % version]
+    for key, path, query in BOOTSTRAP_REQUESTS:
+        body = internal_get(request, path, query)
+        if body is None:
+            return None
+        parts.append(b',"%s":%s' % (key.encode(), body))
+    return b''.join(parts) + b'}'
+
+
+def shell_response(request):
+    """The frontend page, or a 304 if the client's copy is current."""
+    shell = compiled_shell()
+    etag = quote_etag(shell.hash)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if shell.variants is None:
+            shell.variants = compressed_variants(shell.body)
+        response = HttpResponse(shell.body, content_type='text/html; charset=utf-8')
+        response['ETag'] = etag
+        apply_variant(request, response, shell.variants)
+    else:
+        response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.FRONTEND_MAX_AGE}, stale-while-revalidate=86400'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def bootstrap_response(request):
+    """/bootstrap.json for the current catalog version, or a 304."""
+    if not settings.FRONTEND_BOOTSTRAP:
+        raise Http404
+    version = catalog_version()
+    # Without a shared version (DummyCache) there is nothing to tag or cache by
+    etag = None if version is None else quote_etag(f'bootstrap-{version}')
+    response = get_conditional_response(request, etag=etag) if etag else None
+    if response is None:
+        key = f'catalog:v{version}:bootstrap'
+        cached = None if version is None else cache.get(key)
+        if cached is None:
+            body = bootstrap_body(request, version or 0)
+            if body is None:
+                response = JsonResponse({'detail': 'Catalog unavailable.'}, status=503)
+                response['Cache-Control'] = 'no-store'
+                return response
+            cached = (body, compressed_variants(body))
+            if version is not None:
+                cache.set(key, cached, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        body, variants = cached
+        response = HttpResponse(body, content_type='application/json')
+        apply_variant(request, response, variants)
+    if etag:
+        response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.FRONTEND_BOOTSTRAP_MAX_AGE}'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,140 @@
+"""
+Password hashing off the request path
+-------------------------------------
+PBKDF2 is deliberately slow (hundreds of milliseconds per check). Run inline,
+every login or registration blocks its worker for that long, so a login storm
+starves the catalog reads queued behind it.
+
+The async auth views in views.py hand hashing to a small, fixed-size thread
+pool instead. hashlib releases the GIL while it hashes, so the event loop
+(under ASGI) keeps serving other requests, and at most PASSWORD_HASHING_WORKERS
+hashes run at once no matter how many logins arrive - the rest wait their turn
+without holding a worker.
+
+Only pure hashing runs in the pool. Database work stays on Django's usual
+sync_to_async thread, so the pool never opens database connections.
+
+acheck_credentials() reimplements ModelBackend only (the default
+AUTHENTICATION_BACKENDS); any other backend configuration is handed to
+Django's own aauthenticate().
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aauthenticate, get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+# What authenticate() puts in user_login_failed's credentials instead
+CLEANSED_PASSWORD = '********************'
+
+_executor = None
+
+
+def hashing_executor():
+    """The shared hashing pool, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 4),
+            thread_name_prefix='password-hashing',
+        )
+    return _executor
+
+
+async def run_hasher(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor(), partial(func, *args, **kwargs))
+
+
+async def ahash_password(password):
+    return await run_hasher(make_password, password)
+
+
+async def acheck_password(password, encoded):
+    """
+    Return (matches, needs_rehash) for a raw password against a stored hash.
+
+    The hasher's upgrade callback only records that an upgrade is due; the
+    caller re-hashes and saves outside the pool.
+    """
+    upgrade = []
+    matches = await run_hasher(check_password, password, encoded, setter=upgrade.append)
+    return matches, bool(upgrade)
+
+
+def get_user_with_token(username):
+    """
+    Load an active user and their token (if any) in one query.
+
+    auth_token is the reverse one-to-one from Token, so select_related()
+    LEFT JOINs it instead of costing a second SELECT later.
+    """
+    User = get_user_model()
+    try:
+        return User._default_manager.select_related('auth_token').get(**{User.USERNAME_FIELD: username})
+    except User.DoesNotExist:
+        return None
+
+
+def token_for(user):
+    """
+    The user's token, created if missing.
+
+    Replaces Token.objects.get_or_create(), which costs a SELECT plus
+    SAVEPOINT/INSERT/RELEASE: the SELECT already happened in
+    get_user_with_token(), so the common case needs no query at all.
+    Must be called through sync_to_async from async code.
+    """
+    try:
+        return user.auth_token
+    except Token.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            return Token.objects.create(user=user)
+    except IntegrityError:
+        # A concurrent login for the same user created it first
+        return Token.objects.get(user=user)
+
+
+async def acheck_credentials(request, username, password):
+    """
+    Check a username and password the way authenticate() would.
+
+    Returns the user (with auth_token loaded if it exists) or None. Only
+    ModelBackend is reimplemented here, with its hashing in the pool: like
+    ModelBackend, unknown usernames still pay for one hash so response times
+    don't reveal which accounts exist, inactive users are rejected, and a
+    failure sends user_login_failed. With any other AUTHENTICATION_BACKENDS
+    this defers to Django's aauthenticate(), which tries each backend in
+    turn (hashing on the sync_to_async thread instead).
+    """
+    if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+        return await aauthenticate(request, username=username, password=password)
+
+    user = await sync_to_async(get_user_with_token)(username)
+    if user is None:
+        await ahash_password(password)
+    else:
+        matches, needs_rehash = await acheck_password(password, user.password)
+        if matches and user.is_active:
+            if needs_rehash:
+                # Hasher settings changed since this password was stored
+                user.password = await ahash_password(password)
+                await sync_to_async(user.save)(update_fields=['password'])
+            user.backend = MODEL_BACKEND
+            return user
+    await user_login_failed.asend(
+        sender=__name__,
+        credentials={'username': username, 'password': CLEANSED_PASSWORD},
+        request=request,
+    )
+    return None
@@ -0,0 +1,149 @@
+"""
+Atomic stock reservation
+------------------------
+Changing stock through PUT/PATCH is read-modify-write: two orders that read
+stock_quantity=1 at the same time both write 0 and both succeed. Reservations
+instead decrement in the database with one conditional statement:
+
+    UPDATE products_product
+    SET stock_quantity = stock_quantity - <n>, updated_at = now()
+    WHERE id IN (...) AND stock_quantity >= <n>
+
+A row that doesn't have enough stock simply isn't updated, so no interleaving
+of requests can oversell. A cart (several products) is all-or-nothing: the
+rows are first locked with SELECT ... FOR UPDATE in id order - a consistent
+lock order, so two carts can't deadlock on PostgreSQL - then decremented by
+one UPDATE whose per-row amounts come from a CASE. If any row falls short the
+whole transaction rolls back.
+
+SQLite has no row locks, and a transaction that reads before it writes can't
+wait for the write lock: when another writer holds it, SQLite fails at once
+with "database is locked" instead of applying its busy timeout. On SQLite
+reservations therefore skip the SELECT, start with the conditional UPDATE
+(which waits its turn) and read shortfalls afterwards, and reservations in
+one process take turns on a lock (connections of an in-memory test database
+share a cache that doesn't wait at all). If the database still stays locked
+past its timeout, ReservationBusy is raised and the API answers 503 with
+Retry-After instead of a 500. If the read after a failed UPDATE finds no
+product short (another writer restocked in between), the reservation is
+tried again.
+
+QuerySet.update() sends no signals, so the catalog cache version is bumped
+explicitly (cache.py).
+"""
+
+import threading
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .cache import bump_catalog_version
+from .models import Product
+
+
+class ReservationError(Exception):
+    """Base class; `products` maps product id -> stock available (None if it doesn't exist)."""
+
+    def __init__(self, products):
+        super().__init__(products)
+        self.products = products
+
+
+class UnknownProducts(ReservationError):
+    pass
+
+
+class InsufficientStock(ReservationError):
+    pass
+
+
+class ReservationBusy(ReservationError):
+    """The database stayed locked by other writers (SQLite); nothing was changed."""
+
+
+# Reservations in this process take turns on databases without row locks
+_write_lock = threading.Lock()
+
+
+def is_lock_error(error):
+    return 'locked' in str(error)
+
+
+def reserve_stock(quantities):
+    """
+    Decrement stock for {product id: quantity}, all or nothing.
+
+    Returns {product id: new stock}. Raises UnknownProducts or
+    InsufficientStock (with the current stock of the short products), or
+    ReservationBusy if SQLite stayed locked, and leaves every row untouched
+    in that case.
+    """
+    ids = sorted(quantities)
+    if connection.features.has_select_for_update:
+        return decrement_stock(quantities, ids)
+    with _write_lock:
+        try:
+            return decrement_stock(quantities, ids)
+        except OperationalError as error:
+            if not is_lock_error(error):
+                raise
+            raise ReservationBusy({pk: None for pk in ids}) from error
+
+
+def decrement_stock(quantities, ids, attempts=3):
+    """
+    One reservation transaction; see reserve_stock().
+
+    Without row locks, stock can be raised between a failed UPDATE and the
+    read that explains it, leaving no row short; the reservation is then
+    tried again, up to `attempts` times in all.
+    """
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # Lock in id order; this also gives exact shortfalls up front
+            stock = dict(
+                Product.objects.select_for_update()
+                .filter(pk__in=ids).order_by('pk')
+                .values_list('pk', 'stock_quantity')
+            )
+            missing = {pk: None for pk in ids if pk not in stock}
+            if missing:
+                raise UnknownProducts(missing)
+            short = {pk: stock[pk] for pk in ids if stock[pk] < quantities[pk]}
+            if short:
+                raise InsufficientStock(short)
+
+        amount = Case(
+            *[When(pk=pk, then=Value(quantities[pk])) for pk in ids],
+            output_field=IntegerField(),
+        )
+        updated = Product.objects.filter(pk__in=ids, stock_quantity__gte=amount).update(
+            stock_quantity=F('stock_quantity') - amount,
+            updated_at=Now(),
+        )
+        if updated == len(ids):
+            remaining = dict(
+                Product.objects.filter(pk__in=ids).order_by().values_list('pk', 'stock_quantity')
+            )
+        else:
+            remaining = None
+            # Without row locks (SQLite) this is where missing or short rows
+            # show up. Undo the rows that did change.
+            transaction.set_rollback(True)
+
+    if remaining is None:
+        current = dict(Product.objects.filter(pk__in=ids).values_list('pk', 'stock_quantity'))
+        missing = {pk: None for pk in ids if pk not in current}
+        if missing:
+            raise UnknownProducts(missing)
+        short = {pk: current[pk] for pk in ids if current[pk] < quantities[pk]}
+        if short:
+            raise InsufficientStock(short)
+        if attempts > 1:
+            # Restocked since the UPDATE: it may go through now
+            return decrement_stock(quantities, ids, attempts - 1)
+        # Still racing other writers: report every product as it stood
+        raise InsufficientStock(current)
+    bump_catalog_version()
+    return remaining
@@ -0,0 +1,199 @@
+"""
+Measure request latency under concurrency for each database connection mode.
+
+Usage:
+    python manage.py benchmark_connections
+    python manage.py benchmark_connections --url "/api/products/search/?name=phone" \
+        --concurrency 32 --requests 4000 --pool-size 8
+
+Threads play the part of a threaded gunicorn worker: each one sends requests
+through Django's full request cycle, opening and releasing database
+connections the way the server would. Modes:
+
+- per-request: CONN_MAX_AGE=0, a new connection for every request (what a
+  cold serverless instance pays)
+- persistent: the current default, one connection per thread kept for ten
+  minutes and health-checked on each request
+- pool: a psycopg pool of --pool-size connections shared by all threads
+  (PostgreSQL with psycopg 3 and psycopg_pool only; skipped otherwise)
+
+The response cache is disabled so every request reaches the database. For
+each mode the command prints throughput and latency percentiles, and for the
+pool how long requests waited for a free connection (products/pooling.py).
+"""
+
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+
+from products.pooling import pool_stats
+
+MODES = ('per-request', 'persistent', 'pool')
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def pooling_available(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+class Command(BaseCommand):
+    help = 'Benchmark request latency under concurrency with per-request, persistent and pooled connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='/api/products/',
+            help='Path to request (default /api/products/).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Threads sending requests at the same time (default 16).',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Requests per mode (default 2000).',
+        )
+        parser.add_argument(
+            '--pool-size', type=int, default=settings.DATABASE_POOL_OPTIONS['max_size'],
+            help='max_size of the pool in pool mode (default DATABASE_POOL_MAX_SIZE).',
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES),
+            help='Modes to run (default: all that the database supports).',
+        )
+
+    def handle(self, *args, **options):
+        if min(options['concurrency'], options['requests'], options['pool_size']) < 1:
+            raise CommandError('--concurrency, --requests and --pool-size must be positive.')
+        connection = connections[DEFAULT_DB_ALIAS]
+        modes = options['modes']
+        if 'pool' in modes and not pooling_available(connection):
+            self.stdout.write('Skipping pool: it needs PostgreSQL with psycopg 3 and psycopg_pool.')
+            modes = [mode for mode in modes if mode != 'pool']
+
+        database = connection.settings_dict
+        original = {
+            'CONN_MAX_AGE': database['CONN_MAX_AGE'],
+            'CONN_HEALTH_CHECKS': database['CONN_HEALTH_CHECKS'],
+            'OPTIONS': dict(database['OPTIONS']),
+        }
+        self.stdout.write(
+            f'{options["requests"]:,} requests to {options["url"]}, '
+            f'{options["concurrency"]} at a time ({connection.vendor})'
+        )
+        self.stdout.write(
+            f'{"mode":<12}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}{"connects":>10}'
+        )
+        try:
+            with override_settings(CACHES=NO_CACHE, ALLOWED_HOSTS=['*']):
+                for mode in modes:
+                    self.configure(database, mode, original, options['pool_size'])
+                    self.run_mode(mode, options)
+        finally:
+            self.release_connections()
+            database.update(original)
+
+    def configure(self, database, mode, original, pool_size):
+        """Switch the default alias to a connection mode; threads pick it up on connect."""
+        self.release_connections()
+        database['OPTIONS'] = {
+            key: value for key, value in original['OPTIONS'].items() if key != 'pool'
+        }
+        if mode == 'per-request':
+            database.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        elif mode == 'persistent':
+            database.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        else:
+            database.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=original['CONN_HEALTH_CHECKS'])
+            pool = dict(settings.DATABASE_POOL_OPTIONS, max_size=pool_size)
+            pool['min_size'] = min(pool['min_size'], pool_size)
+            database['OPTIONS']['pool'] = pool
+
+    def release_connections(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+
+    def run_mode(self, mode, options):
+        url, total = options['url'], options['requests']
+        latencies = []
+        failures = []
+        connects = []
+        remaining = iter(range(total))
+        lock = threading.Lock()
+
+        def count_connect(sender, connection, **kwargs):
+            with lock:
+                connects.append(connection.alias)
+
+        def worker():
+            client = Client()
+            mine = []
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            break
+                    start = time.perf_counter()
+                    # The test client skips Django's connection housekeeping;
+                    # do what the request_started/finished handlers would
+                    close_old_connections()
+                    response = client.get(url)
+                    close_old_connections()
+                    mine.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(mine)
+
+        connection_created.connect(count_connect)
+        pool_stats(reset=True)
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            connection_created.disconnect(count_connect)
+        elapsed = time.perf_counter() - started
+
+        if failures:
+            raise CommandError(f'{len(failures)} request(s) to {url} failed, e.g. HTTP {failures[0]}.')
+        stats = pool_stats(reset=True).get(DEFAULT_DB_ALIAS)
+        # Checkouts from a pool also fire connection_created; count real connects
+        opened = len(connects) if stats is None else stats.get('connections_num', 0)
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(
+            f'{mode:<12}{len(latencies) / elapsed:>9,.0f}{cuts[49] * 1000:>9.1f}{cuts[94] * 1000:>9.1f}'
+            f'{cuts[98] * 1000:>9.1f}{max(latencies) * 1000:>9.1f}{opened:>10,}'
+        )
+        if stats is not None:
+            self.report_pool(stats)
+
+    def report_pool(self, stats):
+        borrowed = stats.get('requests_num', 0)
+        waited = stats.get('requests_wait_ms', 0)
+        self.stdout.write(
+            f'{"":<12}pool: {borrowed:,} checkouts, {stats.get("requests_queued", 0):,} queued '
+            f'for a connection, avg wait {waited / borrowed if borrowed else 0:.2f} ms, '
+            f'{stats.get("requests_errors", 0)} timed out'
+        )
@@ -0,0 +1,105 @@
+"""
+Compare DRF's JSONRenderer/JSONParser with FastJSONRenderer/FastJSONParser.
+
+Usage:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --sizes 12 100 1000 --repeat 20
+
+For each page size the command takes a product list page as the API builds
+it (ProductSerializer data inside a paginated envelope) and times:
+- render: encoding the page to bytes, as for every uncached list response
+- parse: decoding those bytes again, as for a large JSON request body
+
+It checks that both renderers produce identical bytes before timing them.
+If the catalog has fewer products than the largest page size, synthetic
+products are seeded first and rolled back afterwards. Without orjson the
+fast classes are the stdlib ones and the speedup is about 1.0x.
+"""
+
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from products import renderers
+from products.models import Product
+from products.renderers import FastJSONParser, FastJSONRenderer
+from products.seeding import seed_catalog
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON rendering and parsing (DRF stdlib vs orjson-backed) at several page sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[12, 100, 1000],
+            help='Page sizes to measure (default: 12 100 1000).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Timed runs per measurement; the best one is reported (default 10).',
+        )
+
+    def handle(self, *args, **options):
+        sizes, repeat = options['sizes'], options['repeat']
+        if min(sizes) < 1 or repeat < 1:
+            raise CommandError('--sizes and --repeat must be positive.')
+        if renderers.orjson is None:
+            self.stdout.write('orjson is not installed; the fast classes use the stdlib json module.')
+
+        with transaction.atomic():
+            missing = max(sizes) - Product.objects.count()
+            if missing > 0:
+                self.stdout.write(f'Seeding {missing:,} temporary products...')
+                seed_catalog(missing, prefix='bench')
+            queryset = Product.objects.select_related('category', 'created_by').order_by('-created_at')
+            pages = {size: self.page(list(queryset[:size])) for size in sizes}
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{"page size":>9}  {"measure":<8}{"body KB":>9}{"DRF ms":>10}{"fast ms":>10}{"speedup":>9}'
+        )
+        for size, data in pages.items():
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                raise CommandError(f'FastJSONRenderer output differs from JSONRenderer at page size {size}.')
+            for label, drf, fast in self.measurements(data, body):
+                drf_time = self.best(drf, repeat)
+                fast_time = self.best(fast, repeat)
+                self.stdout.write(
+                    f'{size:>9}  {label:<8}{len(body) / 1024:>9.1f}{drf_time * 1000:>10.2f}'
+                    f'{fast_time * 1000:>10.2f}{drf_time / fast_time:>8.1f}x'
+                )
+
+    def page(self, products):
+        """The data a paginated list response renders."""
+        return {
+            'count': len(products),
+            'next': 'http://testserver/api/products/?page=2',
+            'previous': None,
+            'results': ProductSerializer(products, many=True).data,
+        }
+
+    def measurements(self, data, body):
+        """(label, DRF callable, fast callable) pairs for one page."""
+        return [
+            ('render',
+             lambda: JSONRenderer().render(data),
+             lambda: FastJSONRenderer().render(data)),
+            ('parse',
+             lambda: JSONParser().parse(io.BytesIO(body)),
+             lambda: FastJSONParser().parse(io.BytesIO(body))),
+        ]
+
+    def best(self, func, repeat):
+        func()  # warm up
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,87 @@
+"""
+Compare ProductSerializer with the fast ProductRowSerializer list path.
+
+Usage:
+    python manage.py benchmark_serialization
+    python manage.py benchmark_serialization --sizes 12 100 1000 --repeat 20
+
+For each page size the command times two things per serializer:
+- serialize: turning already-fetched rows into response data (pure CPU)
+- query + serialize: fetching the page and serializing it, like a list request
+
+and prints rows per second for each. If the catalog has fewer products than
+the largest page size, synthetic products are seeded first and rolled back
+afterwards, so the database is left exactly as it was.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.models import Product
+from products.row_serializers import ProductRowSerializer
+from products.seeding import seed_catalog
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark list serialization (ProductSerializer vs ProductRowSerializer) at several page sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[12, 100, 1000],
+            help='Page sizes to measure (default: 12 100 1000).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Timed runs per measurement; the best one is reported (default 10).',
+        )
+
+    def handle(self, *args, **options):
+        sizes, repeat = options['sizes'], options['repeat']
+        if min(sizes) < 1 or repeat < 1:
+            raise CommandError('--sizes and --repeat must be positive.')
+
+        with transaction.atomic():
+            missing = max(sizes) - Product.objects.count()
+            if missing > 0:
+                self.stdout.write(f'Seeding {missing:,} temporary products...')
+                seed_catalog(missing, prefix='bench')
+
+            self.stdout.write(
+                f'{"page size":>9}  {"measure":<18}{"DRF rows/s":>12}{"fast rows/s":>13}{"speedup":>9}'
+            )
+            for size in sizes:
+                for label, drf, fast in self.measurements(size):
+                    drf_rate = size / self.best(drf, repeat)
+                    fast_rate = size / self.best(fast, repeat)
+                    self.stdout.write(
+                        f'{size:>9}  {label:<18}{drf_rate:>12,.0f}{fast_rate:>13,.0f}'
+                        f'{fast_rate / drf_rate:>8.1f}x'
+                    )
+            transaction.set_rollback(True)
+
+    def measurements(self, size):
+        """(label, DRF callable, fast callable) pairs for one page size."""
+        queryset = Product.objects.select_related('category', 'created_by').order_by('-created_at')
+        rows = ProductRowSerializer()
+        instances = list(queryset[:size])
+        values = list(rows.prepare(queryset)[:size])
+        return [
+            ('serialize',
+             lambda: ProductSerializer(instances, many=True).data,
+             lambda: rows.serialize(values)),
+            ('query + serialize',
+             lambda: ProductSerializer(list(queryset[:size]), many=True).data,
+             lambda: rows.serialize(list(rows.prepare(queryset)[:size]))),
+        ]
+
+    def best(self, func, repeat):
+        func()  # warm up
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,122 @@
+"""
+Measure serverless cold starts: import time and time to first response.
+
+Usage:
+    python manage.py benchmark_startup
+    python manage.py benchmark_startup --path /api/products/search/?name=phone --repeat 10
+    python manage.py benchmark_startup --profiles ecommerce_api.settings_serverless --top 15
+
+Each run starts a fresh Python process that does what a new Vercel instance
+does: import api/index.py (Django setup plus its warm-up), then answer one
+request through the WSGI application. Two numbers are reported per settings
+profile, as the median and best of --repeat runs:
+
+- import: until api/index.py has finished importing
+- first response: handling the first request after that
+
+--top N also lists the N modules that took longest to import (python
+-X importtime, self time) in one extra run per profile.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ['ecommerce_api.settings', 'ecommerce_api.settings_serverless']
+
+# Runs in the child process; prints one JSON line
+PROBE = r'''
+import io, json, sys, time
+from urllib.parse import urlsplit
+start = time.perf_counter()
+from api.index import application
+imported = time.perf_counter()
+url = urlsplit(sys.argv[1])
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query,
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+    'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+    'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+body = b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({
+    'import': imported - start, 'first_response': done - imported,
+    'status': statuses[0], 'modules': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cold-start import time and time to first response of api/index.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='/api/products/',
+            help='Request for the first response (default /api/products/).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Fresh processes per profile (default 5).',
+        )
+        parser.add_argument(
+            '--profiles', nargs='+', default=PROFILES,
+            help='Settings modules to compare (default: the full and the serverless profile).',
+        )
+        parser.add_argument(
+            '--top', type=int, default=0,
+            help='Also list the N slowest module imports per profile.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive.')
+        self.stdout.write(
+            f'{"profile":<36}{"import ms":>16}{"first resp. ms":>18}{"modules":>9}  status'
+        )
+        for profile in options['profiles']:
+            runs = [self.probe(profile, options['path']) for _ in range(options['repeat'])]
+            imports = [run['import'] * 1000 for run in runs]
+            firsts = [run['first_response'] * 1000 for run in runs]
+            self.stdout.write(
+                f'{profile:<36}{self.summary(imports):>16}{self.summary(firsts):>18}'
+                f'{runs[-1]["modules"]:>9}  {runs[-1]["status"]}'
+            )
+            if options['top']:
+                for line in self.slowest_imports(profile, options['path'], options['top']):
+                    self.stdout.write(f'    {line}')
+
+    def summary(self, values):
+        """'median (best)'"""
+        return f'{statistics.median(values):.0f} ({min(values):.0f})'
+
+    def run(self, profile, path, *flags):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', PROBE, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'{profile} failed to start:\n{result.stderr}')
+        return result
+
+    def probe(self, profile, path):
+        return json.loads(self.run(profile, path).stdout.strip().splitlines()[-1])
+
+    def slowest_imports(self, profile, path, count):
+        """The `count` largest self times from -X importtime, as 'ms  module' lines."""
+        timings = []
+        for line in self.run(profile, path, '-X', 'importtime').stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, module = line[len('import time:'):].split('|')
+            timings.append((int(self_us), module.strip()))
+        timings.sort(reverse=True)
+        return [f'{micros / 1000:6.1f} ms  {module}' for micros, module in timings[:count]]
@@ -0,0 +1,171 @@
+"""
+Check that every catalog query shape is served by an index.
+
+Usage:
+    python manage.py explain_catalog                # use the data already in the DB
+    python manage.py explain_catalog --seed 50000   # seed a temporary catalog first
+
+Each shape is a real request to ProductViewSet (filters, orderings, page and
+cursor pagination, detail, full-text search) or search_products. The SQL it runs against products_product is
+captured and passed to EXPLAIN; the command fails if any plan falls back to a
+full scan of the table or of one of its indexes. Ordered pages read off an
+index and cut short by their LIMIT are listed as "walk". With --seed the synthetic rows are rolled back afterwards,
+so the database is left exactly as it was.
+"""
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from products.models import Product
+from products.seeding import seed_catalog
+
+TABLE = Product._meta.db_table
+
+# Plan lines that mean "read the whole products table". On SQLite any SCAN of
+# it is one - plain, USING INDEX (every entry of an index) or USING COVERING
+# INDEX; only SEARCH reads a range. The one exception is an ordered page:
+# an unfiltered query with a LIMIT whose ORDER BY the index already provides
+# (no temp B-tree) stops after OFFSET + LIMIT entries (see classify()).
+# {table} also matches the aliases Django gives the table in subqueries.
+FULL_SCAN_PATTERNS = {
+    'sqlite': r'^SCAN (?:{table})\b',
+    'postgresql': r'Seq Scan on (?:{table})\b',
+}
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every catalog query shape and fail if any of them is a full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed this many synthetic products first (rolled back afterwards).',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'explain_catalog does not support {connection.vendor}')
+
+        # Bypass the response cache so every shape really hits the database
+        with transaction.atomic(), override_settings(CACHES=NO_CACHE):
+            if options['seed']:
+                seed_catalog(options['seed'])
+                self.analyze()
+            failures = self.check_shapes()
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} catalog query shape(s) use a full scan: {", ".join(failures)}'
+            )
+        self.stdout.write(self.style.SUCCESS('All catalog query shapes use an index.'))
+
+    def analyze(self):
+        """Refresh planner statistics so the plans reflect the seeded data."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE' if connection.vendor == 'sqlite' else f'ANALYZE {TABLE}')
+
+    def shapes(self):
+        """(label, path, query params) for every way the catalog is read."""
+        sample = Product.objects.select_related('category').order_by('pk').first()
+        if sample is None:
+            raise CommandError('No products to explain against - pass --seed N.')
+        slug = sample.category.slug
+        word = sample.name.split()[0]
+        return [
+            ('list', '/api/products/', {}),
+            ('deep page', '/api/products/', {'page': 5}),
+            ('category', '/api/products/', {'category__slug': slug}),
+            ('category by price', '/api/products/', {'category__slug': slug, 'ordering': 'price'}),
+            ('price', '/api/products/', {'price': str(sample.price)}),
+            ('stock', '/api/products/', {'stock_quantity': sample.stock_quantity}),
+            ('ordering price', '/api/products/', {'ordering': 'price'}),
+            ('ordering -price', '/api/products/', {'ordering': '-price'}),
+            ('ordering name', '/api/products/', {'ordering': 'name'}),
+            ('ordering created_at', '/api/products/', {'ordering': 'created_at'}),
+            ('cursor', '/api/products/', {'pagination': 'cursor'}),
+            ('detail', f'/api/products/{sample.pk}/', {}),
+            ('search', '/api/products/', {'search': word}),
+            ('search endpoint', '/api/products/search/', {'name': word}),
+        ]
+
+    def check_shapes(self):
+        client = APIClient()
+        failures = []
+        shapes = self.shapes()
+
+        # Follow one "next" link so the keyset range query is covered too
+        next_link = client.get('/api/products/', {'pagination': 'cursor'}).data['next']
+        if next_link:
+            shapes.append(('cursor next page', next_link, {}))
+
+        for label, path, params in shapes:
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(path, params)
+            if response.status_code != 200:
+                raise CommandError(f'{label}: GET {path} returned {response.status_code}')
+
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if TABLE not in sql:
+                    continue
+                if 'COUNT(' in sql.split(' FROM ')[0] and ' WHERE ' not in sql:
+                    # An unfiltered COUNT reads every row by definition;
+                    # cursor pagination exists to avoid it
+                    self.stdout.write(f'  note  {label}: unfiltered COUNT (use ?pagination=cursor)')
+                    continue
+                if ' OFFSET ' in sql:
+                    # Reads and skips every row before the page
+                    self.stdout.write(f'  note  {label}: OFFSET walk (use ?pagination=cursor)')
+                plan = self.explain(sql)
+                kind = self.classify(sql, plan)
+                full_scan = kind == 'scan'
+                status = {
+                    'scan': self.style.ERROR('SCAN '),
+                    'walk': self.style.WARNING('walk '),
+                    'ok': self.style.SUCCESS('ok   '),
+                }[kind]
+                self.stdout.write(f'  {status} {label}')
+                if full_scan or self.verbosity > 1:
+                    for line in plan:
+                        self.stdout.write(f'          {line}')
+                if full_scan:
+                    failures.append(label)
+        return failures
+
+    def classify(self, sql, plan):
+        """
+        'ok' if the plan only SEARCHes the products table, 'walk' for an
+        ordered page read off an index (bounded by its LIMIT), 'scan' for
+        anything else that reads the whole table or index.
+        """
+        pattern = self.scan_pattern(sql)
+        if not any(pattern.search(line) for line in plan):
+            return 'ok'
+        ordered_page = (
+            ' LIMIT ' in sql
+            and ' WHERE ' not in sql
+            and not any('TEMP B-TREE' in line for line in plan)
+        )
+        return 'walk' if ordered_page else 'scan'
+
+    def scan_pattern(self, sql):
+        """FULL_SCAN_PATTERNS for this query: the table and any alias it has in the SQL."""
+        names = {TABLE} | set(re.findall(rf'"{TABLE}" (?:AS )?"?(\w+)"?', sql))
+        names = '|'.join(re.escape(name) for name in sorted(names))
+        return re.compile(FULL_SCAN_PATTERNS[connection.vendor].format(table=names))
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        # SQLite rows are (id, parent, notused, detail); Postgres rows are (line,)
+        return [str(row[-1]).strip() for row in rows]
@@ -0,0 +1,131 @@
+"""
+Bulk-load products from a CSV or NDJSON file.
+
+Usage:
+    python manage.py import_products catalog.csv --owner admin
+    python manage.py import_products catalog.ndjson.gz --owner admin --batch-size 50000
+
+The file format matches /api/products/export/ (see products/importer.py for
+the columns). Progress and rows per second are printed after every batch.
+
+Resuming: after each committed batch the position is saved to a checkpoint
+file (<file>.checkpoint by default). If the command is interrupted, running
+it again with the same file continues after the last committed batch;
+--restart ignores the checkpoint. The checkpoint is removed on success.
+"""
+
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products.cache import bump_catalog_version
+from products.importer import detect_format, get_loader, import_products, open_text, read_records
+
+# Invalid rows listed individually before switching to a count
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Import products from a CSV or NDJSON file (optionally .gz), resumably and in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import.')
+        parser.add_argument('--owner', required=True, help='Username recorded as created_by.')
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'],
+            help='File format (default: from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Rows written per transaction (default 10000).',
+        )
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint).')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore an existing checkpoint and import from the first row.',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {path}')
+        file_format = options['format'] or detect_format(path)
+        if file_format is None:
+            raise CommandError('Cannot tell the file format from its name - pass --format csv|ndjson.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["owner"]!r}.')
+
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        self.source = self.describe(path)
+        skip = 0 if options['restart'] else self.read_checkpoint()
+        if skip:
+            self.stdout.write(f'Resuming after row {skip:,} (use --restart to start over).')
+
+        self.started = time.monotonic()
+        self.skip = skip
+        stats = None
+        try:
+            with open_text(path) as stream:
+                stats = import_products(
+                    read_records(stream, file_format),
+                    get_loader(connection, owner.pk),
+                    batch_size=options['batch_size'],
+                    skip=skip,
+                    on_batch=self.progress,
+                )
+        finally:
+            # bulk writes send no signals - move cached catalog responses on
+            bump_catalog_version()
+
+        for position, message in stats.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f'  row {position}: {message}')
+        if len(stats.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'  ... and {len(stats.errors) - MAX_REPORTED_ERRORS:,} more invalid rows')
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats.imported:,} products in {elapsed:.1f}s '
+            f'({stats.imported / max(elapsed, 1e-9):,.0f} rows/s), '
+            f'skipped {len(stats.errors):,} invalid rows.'
+        ))
+
+    def describe(self, path):
+        """Identifies the input file, so a checkpoint is never applied to a different one."""
+        info = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as handle:
+                checkpoint = json.load(handle)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f'Unreadable checkpoint {self.checkpoint_path} - remove it or pass --restart.')
+        if checkpoint.get('source') != self.source:
+            raise CommandError(
+                f'{self.checkpoint_path} belongs to a different or changed file - remove it or pass --restart.'
+            )
+        return checkpoint['rows']
+
+    def progress(self, stats, position):
+        # Written only after the batch committed, so resuming never skips rows
+        with open(self.checkpoint_path, 'w') as handle:
+            json.dump({'source': self.source, 'rows': position}, handle)
+        if self.verbosity >= 1:
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(
+                f'  {position:,} rows  {stats.imported:,} imported  '
+                f'{stats.rows / max(elapsed, 1e-9):,.0f} rows/s'
+            )
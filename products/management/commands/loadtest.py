@@ -0,0 +1,352 @@
+"""
+Drive load against the API's real routes and record the results.
+
+Usage:
+    python manage.py seed_catalog --size 100k     # once, on a scratch database
+    python manage.py loadtest
+    python manage.py loadtest --requests 2000 --concurrency 16 --output results/$(git rev-parse --short HEAD).json
+    python manage.py loadtest --compare results/main.json
+    python manage.py loadtest --base-url http://127.0.0.1:8000 --scenarios list detail search
+
+Scenarios (each run on its own, --requests requests at --concurrency):
+
+- list:       /api/products/ with a random category filter, ordering and page
+- detail:     /api/products/<random id>/
+- search:     /api/products/search/?name=<random word>
+- categories: /api/categories/
+- login:      POST /api/users/login/ as a seeded user
+- create:     POST /api/products/ with a token
+
+By default requests go through Django's full request cycle in this process
+(middleware, routing, views, database), so queries per request can be
+counted too. With --base-url they go over HTTP to a running server instead
+(gunicorn, uvicorn, ...) and the query column is left empty.
+
+Each scenario reports requests per second, p50/p95/p99 latency, errors and
+queries per request. --output writes the same as JSON together with the git
+commit, database and catalog size; --compare prints the change against such
+a file. Random choices come from --seed, so two runs send the same requests.
+Login and create write to the database (tokens, new products): use a scratch
+database seeded with seed_catalog.
+"""
+
+import http.client
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlencode, urlsplit
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+
+from products.management.commands.seed_catalog import DEFAULT_PASSWORD
+from products.models import Category, Product
+from products.seeding import NOUNS, WORDS
+
+SCENARIOS = ('list', 'detail', 'search', 'categories', 'login', 'create')
+
+ORDERINGS = ['price', '-price', '-created_at', 'name']
+
+# The list scenario asks for pages 1..LIST_PAGES
+LIST_PAGES = 5
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+# Successful status per scenario; anything else counts as an error
+EXPECTED_STATUS = {'create': 201}
+
+
+class Workload:
+    """Builds the requests of each scenario from the catalog in the database."""
+
+    def __init__(self, username, password, token):
+        self.username = username
+        self.password = password
+        self.token = token
+        # Categories with enough products for every page the list scenario asks for
+        full = LIST_PAGES * api_settings.PAGE_SIZE
+        self.slugs = list(
+            Category.objects.annotate(size=Count('products')).filter(size__gte=full)
+            .order_by('pk').values_list('slug', flat=True)
+        )
+        self.category_ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+        bounds = Product.objects.order_by('pk').values_list('pk', flat=True)
+        self.first_id = bounds.first()
+        self.last_id = bounds.last()
+        if not self.slugs or self.first_id is None:
+            raise CommandError('The catalog is too small - run `python manage.py seed_catalog` first.')
+
+    def request(self, scenario, rng):
+        """(method, path, JSON body or None, authenticated?) for one request."""
+        if scenario == 'list':
+            params = {'category__slug': rng.choice(self.slugs), 'ordering': rng.choice(ORDERINGS)}
+            if rng.random() < 0.5:
+                params['page'] = rng.randint(1, LIST_PAGES)
+            return 'GET', f'/api/products/?{urlencode(params)}', None, False
+        if scenario == 'detail':
+            # Ids can have gaps; a 404 is still a full request, but the
+            # seeded catalogs are contiguous
+            return 'GET', f'/api/products/{rng.randint(self.first_id, self.last_id)}/', None, False
+        if scenario == 'search':
+            return 'GET', f'/api/products/search/?{urlencode({"name": rng.choice(WORDS + NOUNS)})}', None, False
+        if scenario == 'categories':
+            return 'GET', '/api/categories/', None, False
+        if scenario == 'login':
+            return 'POST', '/api/users/login/', {'username': self.username, 'password': self.password}, False
+        name = f'Load test {rng.choice(NOUNS)} {rng.randint(1, 10**9)}'
+        return 'POST', '/api/products/', {
+            'name': name, 'description': name, 'price': f'{rng.randint(100, 99999) / 100:.2f}',
+            'category_id': rng.choice(self.category_ids), 'stock_quantity': rng.randint(0, 100),
+        }, True
+
+
+class InProcessTransport:
+    """Sends requests through Django's handler in this process and counts queries."""
+    counts_queries = True
+
+    def __init__(self, token):
+        self.client = Client()
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {token}'}
+
+    def send(self, method, path, body, authenticated):
+        extra = self.auth if authenticated else {}
+        # The test client skips Django's connection housekeeping; do what
+        # the request_started/finished handlers would
+        close_old_connections()
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'GET':
+                response = self.client.get(path, **extra)
+            else:
+                response = self.client.post(path, json.dumps(body), content_type='application/json', **extra)
+        close_old_connections()
+        return response.status_code, len(queries)
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """Keeps one HTTP/1.1 connection per thread to a running server."""
+    counts_queries = False
+
+    def __init__(self, base_url, token):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.hostname, url.port, timeout=30)
+        self.prefix = url.path.rstrip('/')
+        self.token = token
+
+    def send(self, method, path, body, authenticated):
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if authenticated:
+            headers['Authorization'] = f'Token {self.token}'
+        try:
+            self.connection.request(method, self.prefix + path, body=data, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # reconnects on the next request
+            return 0, None
+        return response.status, None
+
+    def close(self):
+        self.connection.close()
+
+
+def percentile(cuts, p):
+    return cuts[p - 1] * 1000 if cuts else None
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = 'Load-test the API routes: requests/s, p50/p95/p99 latency and queries per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS),
+            help='Scenarios to run (default: all).',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Measured requests per scenario (default 500).',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Unmeasured requests per scenario first (default 20).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Threads sending requests at the same time (default 8).',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0).')
+        parser.add_argument(
+            '--username', default='seed-user-0',
+            help='User to log in and create products as (default seed-user-0).',
+        )
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help="That user's password.")
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Disable the response cache (in-process only), so every read hits the database.',
+        )
+        parser.add_argument('--base-url', help='Send requests over HTTP to this running server instead.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Print the change against an earlier --output file.')
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency']) < 1 or options['warmup'] < 0:
+            raise CommandError('--requests and --concurrency must be positive, --warmup not negative.')
+        baseline = self.read_results(options['compare']) if options['compare'] else None
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["username"]!r} - run seed_catalog first.')
+        token = Token.objects.get_or_create(user=user)[0].key
+        workload = Workload(options['username'], options['password'], token)
+
+        if options['base_url']:
+            target = options['base_url']
+            make_transport = lambda: HTTPTransport(options['base_url'], token)  # noqa: E731
+        else:
+            target = 'in-process'
+            make_transport = lambda: InProcessTransport(token)  # noqa: E731
+
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if options['no_cache']:
+            overrides['CACHES'] = NO_CACHE
+        self.stdout.write(
+            f'{Product.objects.count():,} products, {options["requests"]:,} requests per scenario, '
+            f'{options["concurrency"]} at a time ({target}, {connection.vendor})'
+        )
+        self.stdout.write(
+            f'{"scenario":<12}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}{"queries":>9}'
+        )
+        results = {}
+        with override_settings(**overrides):
+            for scenario in options['scenarios']:
+                results[scenario] = self.run_scenario(scenario, workload, make_transport, options)
+                self.report(scenario, results[scenario], baseline)
+
+        if options['output']:
+            self.write_results(options['output'], results, options, target)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def run_scenario(self, scenario, workload, make_transport, options):
+        total, warmup = options['requests'], options['warmup']
+        tickets = iter(range(warmup + total))
+        timings, statuses, queries = [], [], []
+        lock = threading.Lock()
+
+        def worker(number):
+            rng = random.Random(f'{options["seed"]}-{scenario}-{number}')
+            transport = make_transport()
+            try:
+                while True:
+                    with lock:
+                        ticket = next(tickets, None)
+                    if ticket is None:
+                        break
+                    method, path, body, authenticated = workload.request(scenario, rng)
+                    start = time.perf_counter()
+                    status, count = transport.send(method, path, body, authenticated)
+                    end = time.perf_counter()
+                    if ticket < warmup:
+                        continue
+                    with lock:
+                        timings.append((start, end))
+                        statuses.append(status)
+                        if count is not None:
+                            queries.append(count)
+            finally:
+                transport.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies = [end - start for start, end in timings]
+        # Throughput over the measured window only, not the warm-up
+        elapsed = max(end for _, end in timings) - min(start for start, _ in timings) if timings else 0
+        expected = EXPECTED_STATUS.get(scenario, 200)
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': len(latencies),
+            'errors': sum(status != expected for status in statuses),
+            'rps': len(latencies) / elapsed if elapsed > 0 else None,
+            'p50_ms': percentile(cuts, 50),
+            'p95_ms': percentile(cuts, 95),
+            'p99_ms': percentile(cuts, 99),
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else None,
+            'queries_per_request': statistics.fmean(queries) if queries else None,
+        }
+
+    def report(self, scenario, result, baseline):
+        queries = result['queries_per_request']
+        self.stdout.write(
+            f'{scenario:<12}{result["rps"] or 0:>9,.0f}{result["p50_ms"] or 0:>9.1f}'
+            f'{result["p95_ms"] or 0:>9.1f}{result["p99_ms"] or 0:>9.1f}{result["errors"]:>8}'
+            f'{"-" if queries is None else f"{queries:.1f}":>9}'
+        )
+        previous = (baseline or {}).get('scenarios', {}).get(scenario)
+        if previous and previous.get('rps') and previous.get('p95_ms') and result['rps']:
+            self.stdout.write(
+                f'{"":<12}vs baseline: req/s {self.change(result["rps"], previous["rps"])}, '
+                f'p95 {self.change(result["p95_ms"], previous["p95_ms"])}'
+            )
+
+    def change(self, new, old):
+        return f'{(new - old) / old * 100:+.1f}%'
+
+    def read_results(self, path):
+        try:
+            with open(path, encoding='utf-8') as stream:
+                return json.load(stream)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+
+    def write_results(self, path, results, options, target):
+        document = {
+            'commit': git_commit(),
+            'recorded_at': datetime.now(dt_timezone.utc).isoformat(),
+            'target': target,
+            'database': connection.vendor,
+            'products': Product.objects.count(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {
+                name: options[name]
+                for name in ('requests', 'warmup', 'concurrency', 'seed', 'no_cache')
+            },
+            'scenarios': results,
+        }
+        with open(path, 'w', encoding='utf-8') as stream:
+            json.dump(document, stream, indent=2)
+            stream.write('\n')
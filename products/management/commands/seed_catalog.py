@@ -0,0 +1,88 @@
+"""
+Fill the database with a synthetic catalog for load testing.
+
+Usage:
+    python manage.py seed_catalog --size 10k
+    python manage.py seed_catalog --size 1m --categories 200 --users 50
+    python manage.py seed_catalog --products 250000 --seed 7 --prefix bench
+
+Presets: 10k, 100k, 1m and 10m products (--products sets any other count).
+Products are written through the import_products loaders (COPY on
+PostgreSQL), one committed batch at a time, with progress after each batch.
+
+The same --seed on an empty database always produces the same catalog, so
+load test results (python manage.py loadtest) are comparable across commits.
+Seeded users are <prefix>-user-0, -1, ...; new ones get --password so
+loadtest can log in as them. Seeding adds to what is already there.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.seeding import bulk_seed_catalog
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+DEFAULT_PASSWORD = 'loadtest-pass-123'
+
+
+class Command(BaseCommand):
+    help = 'Seed a reproducible synthetic catalog (10k / 100k / 1m / 10m products) for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', choices=SIZES, default='10k',
+            help='Catalog size preset (default 10k).',
+        )
+        parser.add_argument('--products', type=int, help='Exact number of products (overrides --size).')
+        parser.add_argument('--categories', type=int, default=20, help='Categories (default 20).')
+        parser.add_argument('--users', type=int, default=10, help='Product owners (default 10).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0).')
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Prefix of the seeded usernames and category slugs (default "seed").',
+        )
+        parser.add_argument(
+            '--password', default=DEFAULT_PASSWORD,
+            help='Password given to newly created users (default matches loadtest).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20000,
+            help='Products per committed batch (default 20000).',
+        )
+
+    def handle(self, *args, **options):
+        products = options['products'] if options['products'] is not None else SIZES[options['size']]
+        for name in ('categories', 'users', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be at least 1.')
+        if products < 0:
+            raise CommandError('--products cannot be negative.')
+
+        self.verbosity = options['verbosity']
+        self.started = time.monotonic()
+        self.total = products
+        created = bulk_seed_catalog(
+            products,
+            categories=options['categories'],
+            users=options['users'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            on_batch=self.progress,
+        )
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {created:,} products in {options["categories"]} categories for '
+            f'{options["users"]} users in {elapsed:.1f}s ({created / max(elapsed, 1e-9):,.0f} rows/s).'
+        ))
+
+    def progress(self, created):
+        if self.verbosity < 1:
+            return
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'{created:,}/{self.total:,} products ({created / max(elapsed, 1e-9):,.0f} rows/s)'
+        )
@@ -0,0 +1,255 @@
+"""
+Prometheus metrics
+------------------
+ecommerce_api.middleware.MetricsMiddleware counts every request and
+GET /metrics serves the totals in the Prometheus text format:
+
+- http_requests_total{route, method, status}
+- http_request_duration_seconds{route, method} (histogram)
+- http_request_db_queries{route} (histogram of SQL statements per request)
+- db_queries_total{alias} / db_query_duration_seconds_total{alias}
+- cache_requests_total{cache, result}: response, facets and token caches,
+  result hit or miss (hit ratio = hit / (hit + miss))
+- auth_attempts_total{method, outcome}: token authentication, login and
+  api-token-auth, outcome success or failure
+- with DATABASE_POOL on (pooling.py), per alias:
+  db_pool_connections{alias, state} (state open or idle),
+  db_pool_requests_waiting{alias}, db_pool_requests_total{alias},
+  db_pool_wait_seconds_total{alias} and db_pool_errors_total{alias}
+  (requests that timed out waiting for a connection)
+
+route is the URL pattern's name (product-list, product-detail, ...), so
+label values are bounded by the URL confs, never by ids or query strings.
+
+Hot path: during a request, queries, cache lookups and auth attempts only
+bump plain counters on a per-request RequestMetrics held in a context
+variable - no lock, no prometheus_client call. The middleware publishes
+them once when the response is ready. Pool counters are read from
+psycopg_pool at most every POOL_REFRESH_SECONDS, and on every scrape.
+
+Multiple worker processes: set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory (gunicorn.conf.py clears it when gunicorn starts).
+prometheus_client then keeps each worker's values in mmap-ed files there
+and /metrics, whichever worker answers, adds them all up.
+
+prometheus_client is only imported once the middleware publishes or
+/metrics is scraped; without it (or with METRICS_ENABLED off, the default
+unless DEBUG is on) the middleware is removed at startup and /metrics
+answers 404.
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+POOL_REFRESH_SECONDS = 5
+
+
+def available():
+    """True if metrics are switched on and prometheus_client is installed."""
+    if not settings.METRICS_ENABLED:
+        return False
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class RequestMetrics:
+    """Counters for one request, published by MetricsMiddleware at the end."""
+
+    __slots__ = ('queries', 'cache', 'auth')
+
+    def __init__(self):
+        self.queries = {}  # alias -> [count, seconds]
+        self.cache = {}    # (cache, result) -> count
+        self.auth = {}     # (method, outcome) -> count
+
+    def add_query(self, alias, duration):
+        totals = self.queries.get(alias)
+        if totals is None:
+            self.queries[alias] = [1, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+
+    def query_count(self):
+        return sum(count for count, _ in self.queries.values())
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def start():
+    state = RequestMetrics()
+    return state, _current.set(state)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_cache(name, hit):
+    """Count one lookup in cache `name` ('response', 'facets', 'token')."""
+    state = _current.get()
+    if state is not None:
+        key = (name, 'hit' if hit else 'miss')
+        state.cache[key] = state.cache.get(key, 0) + 1
+
+
+def record_auth(method, success):
+    """Count one authentication attempt ('token', 'login', 'api-token')."""
+    state = _current.get()
+    if state is not None:
+        key = (method, 'success' if success else 'failure')
+        state.auth[key] = state.auth.get(key, 0) + 1
+
+
+class QueryCounter:
+    """connection.execute_wrapper() callable feeding RequestMetrics."""
+
+    def __init__(self, state, alias):
+        self.state = state
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.state.add_query(self.alias, time.perf_counter() - started)
+
+
+class Metrics:
+    """The prometheus_client metric families, created on first use."""
+
+    def __init__(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.requests = Counter(
+            'http_requests_total', 'HTTP requests by URL pattern, method and status.',
+            ['route', 'method', 'status'],
+        )
+        self.duration = Histogram(
+            'http_request_duration_seconds', 'Time to produce the response.',
+            ['route', 'method'],
+        )
+        self.request_queries = Histogram(
+            'http_request_db_queries', 'SQL statements run per request.',
+            ['route'], buckets=DB_QUERY_BUCKETS,
+        )
+        self.queries = Counter('db_queries_total', 'SQL statements run.', ['alias'])
+        self.query_time = Counter(
+            'db_query_duration_seconds_total', 'Time spent running SQL statements.', ['alias'],
+        )
+        self.cache = Counter('cache_requests_total', 'Cache lookups by result.', ['cache', 'result'])
+        self.auth = Counter('auth_attempts_total', 'Authentication attempts by outcome.', ['method', 'outcome'])
+        # Pool gauges are this process's pools; across workers they add up
+        self.pool_connections = Gauge(
+            'db_pool_connections', 'Pooled database connections, open or idle.',
+            ['alias', 'state'], multiprocess_mode='livesum',
+        )
+        self.pool_waiting = Gauge(
+            'db_pool_requests_waiting', 'Requests queued for a pooled connection right now.',
+            ['alias'], multiprocess_mode='livesum',
+        )
+        self.pool_requests = Counter('db_pool_requests_total', 'Connections handed out by the pool.', ['alias'])
+        self.pool_wait = Counter(
+            'db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.', ['alias'],
+        )
+        self.pool_errors = Counter(
+            'db_pool_errors_total', 'Requests that timed out waiting for a pooled connection.', ['alias'],
+        )
+        # psycopg_pool counts since the pool opened; the counters get the deltas
+        self.pool_seen = {}
+        self.pool_refreshed = 0.0
+        self.pool_lock = threading.Lock()
+        # labels() takes a lock; reuse each label set's child instead
+        self.children = {}
+
+    def child(self, metric, *labels):
+        key = (id(metric), labels)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children.setdefault(key, metric.labels(*labels))
+        return child
+
+    def publish(self, route, method, status, duration, state):
+        self.child(self.requests, route, method, str(status)).inc()
+        self.child(self.duration, route, method).observe(duration)
+        self.child(self.request_queries, route).observe(state.query_count())
+        for alias, (count, seconds) in state.queries.items():
+            self.child(self.queries, alias).inc(count)
+            self.child(self.query_time, alias).inc(seconds)
+        for labels, count in state.cache.items():
+            self.child(self.cache, *labels).inc(count)
+        for labels, count in state.auth.items():
+            self.child(self.auth, *labels).inc(count)
+        if time.monotonic() - self.pool_refreshed >= POOL_REFRESH_SECONDS:
+            self.refresh_pools()
+
+    def refresh_pools(self):
+        """Copy the pools' counters (pooling.pool_stats()) into the pool metrics."""
+        from .pooling import pool_stats
+
+        # One thread at a time, or deltas would be counted twice
+        if not self.pool_lock.acquire(blocking=False):
+            return
+        try:
+            self.pool_refreshed = time.monotonic()
+            for alias, stats in pool_stats().items():
+                self.child(self.pool_connections, alias, 'open').set(stats.get('pool_size', 0))
+                self.child(self.pool_connections, alias, 'idle').set(stats.get('pool_available', 0))
+                self.child(self.pool_waiting, alias).set(stats.get('requests_waiting', 0))
+                seen = self.pool_seen.get(alias, {})
+                for metric, key, scale in (
+                    (self.pool_requests, 'requests_num', 1),
+                    (self.pool_wait, 'requests_wait_ms', 1000),
+                    (self.pool_errors, 'requests_errors', 1),
+                ):
+                    # A reset (pool_stats(reset=True)) starts the count again
+                    delta = stats.get(key, 0) - seen.get(key, 0)
+                    self.child(metric, alias).inc((delta if delta >= 0 else stats.get(key, 0)) / scale)
+                self.pool_seen[alias] = stats
+        finally:
+            self.pool_lock.release()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def route_name(request):
+    """The matched URL pattern's name; 'unmatched' for 404s from the resolver."""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def exposition():
+    """(body, content type) for GET /metrics, summed over worker processes when multiprocess."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    get_metrics().refresh_pools()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
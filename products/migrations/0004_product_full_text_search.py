@@ -0,0 +1,121 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:03
+
+import django.db.models.deletion
+import products.models
+from django.db import migrations, models
+
+# SQLite: an FTS5 table keyed by product id, kept in sync by triggers so that
+# bulk_create(), QuerySet.update() and raw SQL writes are indexed too. Stock
+# and price updates do not touch searchable columns and skip the trigger.
+SQLITE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        name, description, category_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    # Name matches count most, then category, then description
+    "INSERT INTO products_product_fts(products_product_fts, rank) VALUES('rank', 'bm25(10.0, 1.0, 4.0)')",
+    """
+    INSERT INTO products_product_fts(rowid, name, description, category_name)
+    SELECT p.id, p.name, p.description, c.name
+    FROM products_product p JOIN products_category c ON c.id = p.category_id
+    """,
+    """
+    CREATE TRIGGER products_product_fts_insert AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(rowid, name, description, category_name)
+        VALUES (new.id, new.name, new.description,
+                (SELECT name FROM products_category WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_update
+    AFTER UPDATE OF name, description, category_id ON products_product BEGIN
+        DELETE FROM products_product_fts WHERE rowid = old.id;
+        INSERT INTO products_product_fts(rowid, name, description, category_name)
+        VALUES (new.id, new.name, new.description,
+                (SELECT name FROM products_category WHERE id = new.category_id));
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_delete AFTER DELETE ON products_product BEGIN
+        DELETE FROM products_product_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER products_category_fts_update AFTER UPDATE OF name ON products_category BEGIN
+        UPDATE products_product_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM products_product WHERE category_id = new.id);
+    END
+    """,
+]
+
+SQLITE_DROP_SQL = [
+    'DROP TRIGGER IF EXISTS products_category_fts_update',
+    'DROP TRIGGER IF EXISTS products_product_fts_delete',
+    'DROP TRIGGER IF EXISTS products_product_fts_update',
+    'DROP TRIGGER IF EXISTS products_product_fts_insert',
+    'DROP TABLE IF EXISTS products_product_fts',
+]
+
+
+def postgres_search_index():
+    # Must stay identical to PostgresSearchBackend.vector() in products/search.py
+    # or the planner will not use the index
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = (
+        SearchVector('name', weight='A', config='english')
+        + SearchVector('description', weight='B', config='english')
+    )
+    return GinIndex(vector, name='product_search_gin')
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+                return  # No FTS5 in this build; search falls back to icontains
+        for sql in SQLITE_FTS_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('products', 'Product'), postgres_search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_DROP_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('products', 'Product'), postgres_search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchIndex',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='products.product')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('category_name', models.TextField()),
+                ('document', products.models.FullTextField(db_column='products_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'products_product_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
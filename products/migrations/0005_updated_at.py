@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def drop_search_triggers(apps, schema_editor):
+    # SQLite adds these columns by rebuilding both tables, which the FTS sync
+    # triggers from 0004 reference. Drop them here; the post_migrate handler
+    # in products/signals.py recreates them and resyncs the index.
+    if schema_editor.connection.vendor == 'sqlite':
+        for name in (
+            'products_category_fts_update',
+            'products_product_fts_delete',
+            'products_product_fts_update',
+            'products_product_fts_insert',
+        ):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def backfill_product_updated_at(apps, schema_editor):
+    # Existing products have never been modified as far as we know
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_full_text_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_product_updated_at, migrations.RunPython.noop),
+    ]
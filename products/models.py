@@ -6,6 +6,7 @@ This module defines the database schema for the application.
 Models:
 - Category: Product categories for organizing inventory
 - Product: Main product entity with all required fields
+- ProductSearchIndex: Read-only view of the SQLite full-text index (see search.py)
 
 I chose to use Django's built-in User model for user management
 instead of creating a custom User model, since the requirements
@@ -28,9 +29,13 @@ class Category(models.Model):
     Fields:
     - name: Display name for the category (e.g., "Electronics")
     - slug: URL-friendly version (e.g., "electronics")
+    - updated_at: Auto-set on every save (used for conditional GETs)
     """
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
+    
+    # Last change - drives ETag/Last-Modified on category and product responses
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"  # Fix plural in admin panel
@@ -52,6 +57,7 @@ class Product(models.Model):
     - image_url: Optional URL to product image (for future enhancement)
     - created_by: Links product to the user who created it
     - created_at: Auto-set timestamp when product is created
+    - updated_at: Auto-set timestamp of the last modification
     
     Week 2: This model supports full CRUD operations through ProductViewSet.
     """
@@ -82,9 +88,70 @@ class Product(models.Model):
     
     # Auto-set creation timestamp - auto_now_add sets this once on creation
     created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Auto-set on every save() so clients can revalidate with ETag/Last-Modified.
+    # QuerySet.update() bypasses auto_now - pass updated_at=Now() explicitly.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
     
     class Meta:
-        ordering = ['-created_at']  # Newest products first by default
\ No newline at end of file
+        ordering = ['-created_at']  # Newest products first by default
+        
+        # Composite indexes matching ProductViewSet's filter/ordering paths.
+        # Each one ends in id so keyset (cursor) pages are pure index range scans.
+        # Check them with: python manage.py explain_catalog
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),   # default list
+            models.Index(fields=['category', '-created_at', '-id'], name='product_cat_created_idx'),  # ?category__slug=
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),          # ?price= / ?ordering=price
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),            # ?ordering=name
+            models.Index(fields=['stock_quantity', 'id'], name='product_stock_id_idx'), # ?stock_quantity=
+        ]
+
+
+class FullTextField(models.TextField):
+    """A column that supports the SQLite FTS5 `match` lookup."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class ProductSearchIndex(models.Model):
+    """
+    SQLite FTS5 table mirroring each product's searchable text.
+    
+    The table is created (and kept in sync by triggers) in migration 0004 when
+    the database is SQLite; Django never manages it. Joining to it lets the
+    ORM run a full-text MATCH and order by relevance:
+    
+        Product.objects.filter(search_index__document__match='"lap"*')
+                       .order_by('search_index__rank')
+    
+    - document: the hidden column named after the table, used for MATCH
+    - rank: FTS5's bm25() relevance (lower is better)
+    """
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_index',
+    )
+    name = models.TextField()
+    description = models.TextField()
+    category_name = models.TextField()
+    document = FullTextField(db_column='products_product_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'products_product_fts'
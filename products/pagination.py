@@ -0,0 +1,243 @@
+"""
+Pagination for the product catalog
+----------------------------------
+PageNumberPagination runs a COUNT(*) over the filtered queryset and an
+OFFSET scan on every request, so deep pages of a large catalog get slower
+the further you go. CatalogPagination keeps ?page=N working exactly as
+before (the frontend relies on it) and adds an opt-in keyset ("cursor")
+mode:
+
+- /api/products/?pagination=cursor      -> first page in cursor mode
+- /api/products/?cursor=<token>         -> any following page
+
+Cursor mode pages on the active ordering field (the viewset default or the
+?ordering= value) with the primary key as a tiebreak, e.g. (created_at, id).
+Each page is a single indexed range query with no COUNT and no OFFSET, so
+page 1000 costs the same as page 1, and rows inserted while a client is
+paging never shift or duplicate items on later pages. A cursor records the
+ordering it was taken under; reused with a different ?ordering= (or edited
+by hand) it answers 404 "Invalid cursor". Orderings that aren't a column of
+the product itself can't be paged this way: ?search= without ?ordering=
+(relevance order on the full-text backends) answers 400 in cursor mode.
+
+SearchPagination serves /api/products/search/: pages of at most 100 hits,
+relevance order, and the total match count computed by a window function in
+the same query as the page instead of a separate COUNT(*).
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Count, Q, Window
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def row_value(row, name):
+    """A column off a page row - a model instance or a values() dict."""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+class CatalogPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset cursor mode.
+
+    Cursor responses have the shape {"next", "previous", "results"} - there is
+    no "count" because computing it is exactly the cost cursor mode avoids.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_ordering_message = (
+        'Cursor pagination needs a column ordering. Pass ?ordering= or use ?page=.'
+    )
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.display_page_controls = False
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.field_name, self.descending = self.get_keyset_ordering(queryset)
+        position = self.decode_cursor(request, queryset.model)
+        reverse = bool(position and position['r'])
+
+        # Walking backwards flips the sort; results are flipped back below
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}pk')
+        if position:
+            op = 'lt' if descending else 'gt'
+            value, pk = position['v'], position['pk']
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field_name}__{op}': value})
+                    | Q(**{self.field_name: value, f'pk__{op}': pk})
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page_rows = rows
+        return rows
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Return (field name, descending) for the queryset's leading ordering.
+
+        Only concrete columns on the model itself can be keyset-paginated.
+        Any other ordering - search relevance, an expression, a related
+        column - is a 400 rather than silently paged in another order.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['pk']
+        first = ordering[0] if isinstance(ordering[0], str) else ''
+        name = first.lstrip('-')
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if name != 'pk' and (field is None or not field.concrete or field.is_relation):
+            raise ParseError(self.unsupported_ordering_message)
+        return name, first.startswith('-')
+
+    def encode_cursor(self, row, reverse):
+        value = row_value(row, self.field_name)
+        payload = {
+            'f': self.field_name,
+            'd': int(self.descending),
+            'v': value.isoformat() if hasattr(value, 'isoformat') else str(value),
+            'pk': row_value(row, 'pk'),
+            'r': int(reverse),
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode())
+        return replace_query_param(
+            remove_query_param(self.base_url, self.mode_query_param),
+            self.cursor_query_param, token.decode().rstrip('='),
+        )
+
+    def decode_cursor(self, request, model):
+        """
+        The position a cursor points at, with its value converted for the
+        ordering field. Cursors from another ordering, or whose value doesn't
+        fit the field, are rejected rather than turned into a broken query.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if (payload['f'], bool(payload['d'])) != (self.field_name, self.descending):
+                raise ValueError('cursor was taken under another ordering')
+            field = model._meta.pk if self.field_name == 'pk' else model._meta.get_field(self.field_name)
+            value = field.to_python(payload['v'])
+            if value is None:
+                raise ValueError('empty cursor value')
+            return {'v': value, 'pk': model._meta.pk.to_python(payload['pk']), 'r': bool(payload['r'])}
+        except (TypeError, ValueError, KeyError, AttributeError, ValidationError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Bounded pages for search results.
+
+    - ?page=N and ?page_size=N (default PAGE_SIZE, at most max_page_size)
+    - only the first max_results hits are reachable, like a search engine,
+      so neither the OFFSET nor the response can grow without bound
+    - one query per page: COUNT(*) OVER () rides along with the rows
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    max_results = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            self.page_number = 0
+        offset = (self.page_number - 1) * page_size
+        if self.page_number < 1 or offset >= self.max_results:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param), message='',
+            ))
+
+        limit = min(page_size, self.max_results - offset)
+        rows = list(queryset.annotate(search_total=Window(Count('pk')))[offset:offset + limit])
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number, message='That page contains no results',
+            ))
+        self.count = row_value(rows[0], 'search_total') if rows else 0
+        self.has_next = offset + limit < min(self.count, self.max_results)
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
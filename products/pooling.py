@@ -0,0 +1,57 @@
+"""
+Database connection pooling
+---------------------------
+With DATABASE_POOL=true (settings.py) each PostgreSQL alias gets a psycopg
+ConnectionPool per process instead of a persistent connection per thread:
+a request borrows a connection when it first queries and returns it when
+the request ends. A gunicorn worker with many threads - or an ASGI worker
+running sync views in a thread pool - then needs only as many connections
+as run queries at the same moment, and never more than max_size.
+
+This module opens pools ahead of the first request (api/index.py does that
+while a serverless instance cold-starts) and reads the pool's own counters,
+including how long requests waited for a free connection. /metrics exports
+them as the db_pool_* metrics (metrics.py).
+
+Without pooling (SQLite, psycopg2, DATABASE_POOL unset) every function here
+simply finds no pools.
+"""
+
+from django.db import connections
+
+
+def pools():
+    """{alias: psycopg ConnectionPool} for every pooled database alias."""
+    found = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            found[alias] = pool
+    return found
+
+
+def open_pools(wait=False):
+    """
+    Start connecting now rather than on the first query. With wait=False the
+    pool fills min_size connections in the background.
+    """
+    for pool in pools().values():
+        pool.open(wait=wait)
+
+
+def pool_stats(reset=False):
+    """
+    {alias: stats} from psycopg_pool. The most useful keys:
+
+    - pool_size / pool_available: connections open / idle right now
+    - requests_num: connections handed out
+    - requests_waiting: requests queued for a connection right now
+    - requests_wait_ms: total time spent waiting for one
+    - requests_errors: requests that gave up after the pool timeout
+
+    reset=True zeroes the counters after reading them (pop_stats()).
+    """
+    return {
+        alias: pool.pop_stats() if reset else pool.get_stats()
+        for alias, pool in pools().items()
+    }
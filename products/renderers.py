@@ -0,0 +1,117 @@
+"""
+Renderers and parsers
+---------------------
+FastJSONRenderer / FastJSONParser (the REST_FRAMEWORK defaults) are DRF's
+JSONRenderer / JSONParser with orjson doing the work when it is installed.
+The stdlib encoder walks every response in Python and calls back into
+JSONEncoder.default() for each value it doesn't know; orjson encodes the
+same dicts, lists and strings in C, several times faster on a product page.
+The bytes are the same:
+
+- datetimes, Decimals, UUIDs and lazy strings still go through DRF's
+  JSONEncoder.default() (datetime -> "2024-01-15T10:30:00Z"); serializers
+  have already turned prices into "449.99" strings anyway
+- compact separators, UTF-8 output, U+2028/U+2029 escaped like DRF does
+- anything orjson refuses (non-string dict keys, integers over 64 bits) is
+  rendered by the stdlib path instead, as are indented responses
+  (?format=json with ; indent=, the browsable API)
+
+One difference: orjson writes NaN and Infinity floats as null where the
+stdlib path raises ValueError. API data never contains them.
+
+The parser falls back the same way, so malformed bodies get exactly DRF's
+"JSON parse error - ..." message. Without orjson both classes are plain
+JSONRenderer / JSONParser. Compare with: python manage.py benchmark_json
+
+/api/products/export/ streams its body itself (see export.py), so the
+NDJSON and CSV renderers are mainly there for content negotiation: they let
+clients pick a format with ?format=ndjson / ?format=csv, a .csv/.ndjson
+suffix or the Accept header. Their render() is only used for small
+non-streamed bodies such as validation errors.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # stdlib json only
+    orjson = None
+
+if orjson is not None:
+    # datetime/date/time go to JSONEncoder.default() so they keep DRF's format
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it's installed; same output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson when it's installed."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let the stdlib parser accept what it accepts (integers over 64
+            # bits) and word the ParseError for everything else
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(item, cls=JSONEncoder) + '\n' for item in items).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma-separated values with a header row taken from the first item's keys."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not data:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(items[0]))
+        writer.writeheader()
+        writer.writerows(items)
+        return buffer.getvalue().encode()
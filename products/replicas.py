@@ -0,0 +1,106 @@
+"""
+Read replicas
+-------------
+With DATABASE_REPLICA_URLS set (settings.py), catalog reads - product and
+category lists/details, export, facets and search - are spread over the
+replicas, and everything else stays on the primary ('default'):
+
+- writes, always (ReplicaRouter.db_for_write)
+- authentication: token and user lookups happen before a view opts in
+- reads by views that didn't call read_from_replicas()
+- reads later in a request that has already written (read-your-writes): a
+  replica may not have the new rows yet
+
+Routing state lives in a context variable that is reset at the start and end
+of every request, so management commands, shells and tests read from the
+primary unless they opt in themselves.
+
+Replication itself is the database's job. To try it locally with SQLite:
+
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py runserver
+
+(the copy doesn't follow later writes - fine for watching the routing).
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+
+
+class RoutingState:
+    """Per-request routing flags; mutated in place so copied contexts (ASGI threads) share them."""
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+def reset_routing(**kwargs):
+    _routing.set(RoutingState())
+
+
+def clear_routing(**kwargs):
+    _routing.set(None)
+
+
+def read_from_replicas():
+    """Send this request's remaining reads to a replica, unless it has already written."""
+    state = _routing.get()
+    if state is None:
+        state = RoutingState()
+        _routing.set(state)
+    state.replica = True
+
+
+def routed_to_replica():
+    state = _routing.get()
+    return state is not None and state.replica and not state.wrote
+
+
+class ReplicaRouter:
+    """Database router for settings.DATABASE_REPLICAS (installed by settings.py when there are any)."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and routed_to_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None  # the primary
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadsMixin:
+    """
+    ViewSet mixin: safe (GET/HEAD/OPTIONS) requests read from the replicas
+    once authentication and permission checks have run on the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            read_from_replicas()
+
+
+request_started.connect(reset_routing, dispatch_uid='replicas.reset_routing')
+request_finished.connect(clear_routing, dispatch_uid='replicas.clear_routing')
@@ -0,0 +1,150 @@
+"""
+Fast read-only serialization for product lists
+----------------------------------------------
+ProductSerializer builds a model instance per row and then runs DRF's field
+machinery on it (nested CategorySerializer, source lookups, the
+StringRelatedField, DecimalField quantizing). For read-only lists that work
+is mostly overhead, so ProductViewSet.list and search_products use
+ProductRowSerializer instead:
+
+- the queryset is turned into values() rows - no model instances, and only
+  the columns the response needs
+- each output key has a converter chosen once, when the serializer is built
+  (decimal -> "449.99", datetime -> "2024-01-15T10:30:00Z", ...)
+- rows are plain dicts in exactly the shape and key order ProductSerializer
+  produces (the tests compare the two)
+
+Paginators read the ordering value and pk off the row dicts (row['pk']) for
+cursor links, and annotations added after prepare() (SearchPagination's
+windowed count) simply become extra keys.
+
+Benchmark: python manage.py benchmark_serialization
+"""
+
+from django.conf import settings
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import ISO_8601
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .timing import measure
+
+
+def datetime_converter():
+    """DRF's DateTimeField output, without the per-call settings and timezone work when UTC/ISO."""
+    if api_settings.DATETIME_FORMAT == ISO_8601 and settings.USE_TZ and settings.TIME_ZONE == 'UTC':
+        def convert(value):
+            if value is None:
+                return None
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    return DateTimeField().to_representation
+
+
+def decimal_converter():
+    """DRF's DecimalField output for a value the database already rounded to the field's places."""
+    if api_settings.COERCE_DECIMAL_TO_STRING:
+        return lambda value: None if value is None else f'{value:f}'
+    return None
+
+
+class ProductRowSerializer:
+    """
+    Read-only ProductSerializer for lists: prepare() the queryset, then
+    serialize() the page it yields.
+
+    COLUMNS lists every output key in ProductSerializer's order as
+    (key, values() lookup, converter kind). EXPANDED holds the nested form of
+    keys that ?expand= can open up. fields/omit/expand work like
+    ProductSerializer's (see sparse.py) and also trim the SELECT.
+    """
+    COLUMNS = (
+        ('id', 'pk', None),
+        ('category', 'category_id', None),
+        ('created_by', 'created_by__username', None),
+        ('category_name', 'category__name', None),
+        ('name', 'name', None),
+        ('description', 'description', None),
+        ('price', 'price', 'decimal'),
+        ('stock_quantity', 'stock_quantity', None),
+        ('image_url', 'image_url', None),
+        ('created_at', 'created_at', 'datetime'),
+        ('updated_at', 'updated_at', 'datetime'),
+    )
+    EXPANDED = {
+        'category': (
+            ('id', 'category__id', None),
+            ('name', 'category__name', None),
+            ('slug', 'category__slug', None),
+            ('updated_at', 'category__updated_at', 'datetime'),
+        ),
+    }
+
+    def __init__(self, fields=None, omit=(), expand=()):
+        converters = {'datetime': datetime_converter(), 'decimal': decimal_converter()}
+        columns = [
+            (key, self.EXPANDED[key] if key in expand else lookup, kind)
+            for key, lookup, kind in self.COLUMNS
+            if (fields is None or key in fields) and key not in omit
+        ]
+        self.lookups = []
+        self.plan = self.compile(columns, converters)
+
+    def compile(self, columns, converters):
+        """Turn columns into [(key, values() key or nested plan, converter)]."""
+        plan = []
+        for key, lookup, kind in columns:
+            if isinstance(lookup, tuple):
+                plan.append((key, self.compile(lookup, converters), None))
+                continue
+            if lookup not in self.lookups:
+                self.lookups.append(lookup)
+            plan.append((key, lookup, converters.get(kind)))
+        return plan
+
+    def prepare(self, queryset):
+        """
+        The rows to paginate: dicts of just the needed columns, plus the pk
+        and ordering columns that cursor pagination reads off each row.
+        """
+        lookups = list(self.lookups)
+        for name in ['pk', *queryset.query.order_by]:
+            name = name.lstrip('-') if isinstance(name, str) else None
+            if name and LOOKUP_SEP not in name and name not in lookups:
+                lookups.append(name)
+        return queryset.values(*lookups)
+
+    def build(self, row, plan):
+        data = {}
+        for key, source, convert in plan:
+            if isinstance(source, list):
+                data[key] = self.build(row, source)
+            elif convert is None:
+                data[key] = row[source]
+            else:
+                data[key] = convert(row[source])
+        return data
+
+    def serialize(self, rows):
+        plan = self.plan
+        with measure('serialize'):
+            return [self.build(row, plan) for row in rows]
+
+
+class RowSerializerListMixin:
+    """
+    ViewSet mixin that serves `list` through a row serializer. Place it after
+    ConditionalGetMixin so validators still apply, and
+    use it with SparseFieldsMixin (sparse.py), which supplies sparse_options().
+    """
+    row_serializer_class = ProductRowSerializer
+
+    def list(self, request, *args, **kwargs):
+        rows = self.row_serializer_class(**self.sparse_options())
+        queryset = rows.prepare(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.serialize(page))
+        return Response(rows.serialize(queryset))
@@ -0,0 +1,236 @@
+"""
+Full-text product search
+------------------------
+`icontains` over name/description/category is a leading-wildcard LIKE that
+can't use an index, so every search reads the whole products table. This
+module puts a pluggable, ranked full-text engine behind both the ?search=
+filter on ProductViewSet and the /api/products/search/ endpoint.
+
+Backends (picked from the database vendor, or PRODUCT_SEARCH_BACKEND):
+- PostgresSearchBackend: weighted SearchVector over name + description,
+  served by a GIN expression index, ranked with SearchRank
+- SQLiteSearchBackend: FTS5 table kept in sync by triggers (migration 0004),
+  ranked with bm25
+- IcontainsSearchBackend: the original LIKE behaviour, for other databases
+  or SQLite builds without FTS5
+
+Every backend filters a Product queryset, annotates `search_rank` and orders
+best matches first. Search text is split into words and each word is
+prefix-matched, so "lap pro" finds "Pro Laptop 15".
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import Category, ProductSearchIndex
+
+# Logical fields a search can target
+ALL_FIELDS = ('name', 'description', 'category')
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_words(text):
+    """Split user input into plain words - never pass raw input to a query parser."""
+    return WORD_RE.findall(text or '')
+
+
+class IcontainsSearchBackend:
+    """Every word must appear (case-insensitively) in one of the fields. No ranking."""
+    lookups = {
+        'name': 'name__icontains',
+        'description': 'description__icontains',
+        'category': 'category__name__icontains',
+    }
+
+    def search(self, queryset, text, fields=ALL_FIELDS):
+        words = search_words(text)
+        if not words:
+            return queryset
+        for word in words:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{self.lookups[field]: word})
+            queryset = queryset.filter(condition)
+        return (
+            queryset
+            .annotate(search_rank=Value(0.0, output_field=FloatField()))
+            .order_by('-created_at', '-pk')
+        )
+
+
+class SQLiteSearchBackend:
+    """FTS5 MATCH joined to products by rowid, ordered by bm25 rank."""
+    columns = {'name': 'name', 'description': 'description', 'category': 'category_name'}
+
+    def build_query(self, words, fields):
+        terms = ' '.join(f'"{word}"*' for word in words)
+        if set(fields) == set(ALL_FIELDS):
+            return terms
+        columns = ' '.join(self.columns[field] for field in fields)
+        return f'{{{columns}}} : ({terms})'
+
+    def search(self, queryset, text, fields=ALL_FIELDS):
+        words = search_words(text)
+        if not words:
+            return queryset
+        return (
+            queryset
+            .filter(search_index__document__match=self.build_query(words, fields))
+            .annotate(search_rank=-F('search_index__rank'))
+            .order_by('search_index__rank', '-created_at', '-pk')
+        )
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector match (name > description) plus category name matches."""
+    weights = {'name': 'A', 'description': 'B'}
+
+    def vector(self):
+        # Must stay identical to the GIN index in migration 0004
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector('name', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        )
+
+    def build_query(self, words, fields):
+        from django.contrib.postgres.search import SearchQuery
+
+        # Restricting lexeme weights (lap:*A) searches single columns
+        # while still using the one combined index
+        weights = ''.join(self.weights[f] for f in fields if f in self.weights)
+        raw = ' & '.join(f'{word}:*{weights}' for word in words)
+        return SearchQuery(raw, search_type='raw', config='english')
+
+    def search(self, queryset, text, fields=ALL_FIELDS):
+        from django.contrib.postgres.search import SearchRank
+
+        words = search_words(text)
+        if not words:
+            return queryset
+        condition = Q()
+        rank = Value(0.0, output_field=FloatField())
+        if set(fields) & set(self.weights):
+            query = self.build_query(words, fields)
+            # alias() keeps the tsvector out of the SELECT list
+            queryset = queryset.alias(search_document=self.vector())
+            condition |= Q(search_document=query)
+            rank = SearchRank(F('search_document'), query)
+        if 'category' in fields:
+            # Categories are a tiny table, so a LIKE over them is cheap; the
+            # products side then uses the category_id index
+            categories = Category.objects.all()
+            for word in words:
+                categories = categories.filter(name__icontains=word)
+            condition |= Q(category__in=categories)
+        return (
+            queryset
+            .filter(condition)
+            .annotate(search_rank=rank)
+            .order_by('-search_rank', '-created_at', '-pk')
+        )
+
+
+# SQLite sync triggers for the FTS5 table, as created by migration 0004.
+# SQLite migrations that rebuild products_product or products_category drop
+# (or trip over) these, so they are dropped before such migrations and put
+# back by ensure_sqlite_search_triggers() after every migrate.
+SQLITE_TRIGGERS = {
+    'products_product_fts_insert': """
+        CREATE TRIGGER products_product_fts_insert AFTER INSERT ON products_product BEGIN
+            INSERT INTO products_product_fts(rowid, name, description, category_name)
+            VALUES (new.id, new.name, new.description,
+                    (SELECT name FROM products_category WHERE id = new.category_id));
+        END
+    """,
+    'products_product_fts_update': """
+        CREATE TRIGGER products_product_fts_update
+        AFTER UPDATE OF name, description, category_id ON products_product BEGIN
+            DELETE FROM products_product_fts WHERE rowid = old.id;
+            INSERT INTO products_product_fts(rowid, name, description, category_name)
+            VALUES (new.id, new.name, new.description,
+                    (SELECT name FROM products_category WHERE id = new.category_id));
+        END
+    """,
+    'products_product_fts_delete': """
+        CREATE TRIGGER products_product_fts_delete AFTER DELETE ON products_product BEGIN
+            DELETE FROM products_product_fts WHERE rowid = old.id;
+        END
+    """,
+    'products_category_fts_update': """
+        CREATE TRIGGER products_category_fts_update AFTER UPDATE OF name ON products_category BEGIN
+            UPDATE products_product_fts SET category_name = new.name
+            WHERE rowid IN (SELECT id FROM products_product WHERE category_id = new.id);
+        END
+    """,
+}
+
+
+def ensure_sqlite_search_triggers(connection):
+    """
+    Recreate any missing FTS sync trigger and, if one was missing, rebuild the
+    index from the products table (rows may have changed while unsynced).
+    Returns True when a rebuild happened.
+    """
+    table = ProductSearchIndex._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {name for _, name in cursor.fetchall()}
+        if table not in existing:
+            return False
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        if not missing:
+            return False
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f"""
+            INSERT INTO {table}(rowid, name, description, category_name)
+            SELECT p.id, p.name, p.description, c.name
+            FROM products_product p JOIN products_category c ON c.id = p.category_id
+        """)
+    return True
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend(using='default'):
+    """Return the configured search backend for a database alias."""
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    connection = connections[using]
+    backend = BACKENDS.get(connection.vendor, IcontainsSearchBackend)
+    if backend is SQLiteSearchBackend:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        if ProductSearchIndex._meta.db_table not in tables:
+            backend = IcontainsSearchBackend
+    return backend()
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter that routes ?search= through the
+    full-text backend. Results come back best match first unless the client
+    also passes ?ordering=.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, ' '.join(terms))
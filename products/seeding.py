@@ -0,0 +1,139 @@
+"""
+Synthetic catalog data
+----------------------
+Helpers for filling the database with a realistic-looking catalog, used by
+management commands that need data to measure against (explain_catalog,
+benchmark_serialization, seed_catalog, loadtest).
+
+- seed_catalog(): ORM bulk_create() in batches, fine for the few thousand
+  rows the benchmarks seed inside a transaction they roll back
+- bulk_seed_catalog(): the import_products loaders (importer.py) - COPY on
+  PostgreSQL, executemany() without per-row search triggers on SQLite - for
+  catalogs of millions of rows, committed batch by batch
+
+Both are memory-flat and deterministic for a given seed.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .importer import get_loader
+from .models import Category, Product
+
+WORDS = [
+    'wireless', 'smart', 'classic', 'portable', 'premium', 'eco', 'mini', 'pro',
+    'ultra', 'vintage', 'compact', 'deluxe', 'outdoor', 'digital', 'organic',
+]
+NOUNS = [
+    'phone', 'laptop', 'headphones', 'kettle', 'backpack', 'lamp', 'camera',
+    'watch', 'speaker', 'jacket', 'chair', 'blender', 'monitor', 'bottle', 'desk',
+]
+
+
+def seed_users(count, prefix='seed', password=None):
+    """Get or create `count` users named <prefix>-user-<i>; new ones get `password` if given."""
+    hashed = make_password(password)  # hash once, not once per user
+    return [
+        User.objects.get_or_create(username=f'{prefix}-user-{i}', defaults={'password': hashed})[0]
+        for i in range(count)
+    ]
+
+
+def seed_categories(count, prefix='seed'):
+    return [
+        Category.objects.get_or_create(
+            slug=f'{prefix}-category-{i}', defaults={'name': f'{prefix.title()} Category {i}'},
+        )[0]
+        for i in range(count)
+    ]
+
+
+def synthetic_product(rng, number, category_ids):
+    """(name, description, price, category_id, stock_quantity) for product `number`."""
+    name = f'{rng.choice(WORDS).title()} {rng.choice(NOUNS)} {number}'
+    return (
+        name,
+        f'{name} - {" ".join(rng.choices(WORDS + NOUNS, k=12))}',
+        Decimal(rng.randint(100, 500000)) / 100,
+        rng.choice(category_ids),
+        rng.randint(0, 500),
+    )
+
+
+def seed_catalog(products, categories=10, users=1, batch_size=5000, seed=0, prefix='seed'):
+    """
+    Create `categories` categories, `users` owners and `products` products.
+
+    Timestamps are spread over the past year and prices/stock are random
+    (deterministic for a given seed) so filters and orderings see a
+    realistic distribution. Returns the number of products created.
+    """
+    rng = random.Random(seed)
+    owners = seed_users(users, prefix)
+    category_ids = [category.pk for category in seed_categories(categories, prefix)]
+    now = timezone.now()
+    created = 0
+    while created < products:
+        batch = []
+        for i in range(created, min(created + batch_size, products)):
+            name, description, price, category_id, stock = synthetic_product(rng, i, category_ids)
+            batch.append(Product(
+                name=name,
+                description=description,
+                price=price,
+                category_id=category_id,
+                stock_quantity=stock,
+                created_by=rng.choice(owners),
+            ))
+        Product.objects.bulk_create(batch)
+
+        # auto_now_add stamps every row with "now"; spread the batch over the
+        # past year so created_at orderings and ranges behave like real data
+        for product in batch:
+            product.created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        Product.objects.bulk_update(batch, ['created_at'])
+        created += len(batch)
+    return created
+
+
+def bulk_seed_catalog(products, categories=10, users=1, batch_size=20000, seed=0, prefix='seed',
+                      password=None, on_batch=None):
+    """
+    seed_catalog() for very large catalogs, through the import loaders.
+
+    Each batch is committed on its own; on_batch(created) is called after
+    each one. The loaders take one owner per batch, so owners rotate batch by
+    batch. Returns the number of products created.
+    """
+    rng = random.Random(seed)
+    owners = [user.pk for user in seed_users(users, prefix, password)]
+    category_ids = [category.pk for category in seed_categories(categories, prefix)]
+    now = timezone.now()
+    loader = get_loader(connection, owners[0])
+    created = 0
+    loader.setup()
+    try:
+        while created < products:
+            rows = []
+            for i in range(created, min(created + batch_size, products)):
+                name, description, price, category_id, stock = synthetic_product(rng, i, category_ids)
+                created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+                # importer.COLUMNS order: id, name, description, price, category_id, stock, image_url, created_at
+                rows.append((None, name, description, price, category_id, stock, '', created_at))
+            loader.owner_id = owners[(created // batch_size) % len(owners)]
+            with transaction.atomic():
+                loader.load(rows)
+            created += len(rows)
+            if on_batch:
+                on_batch(created)
+    finally:
+        loader.finish()
+        bump_catalog_version()
+    return created
@@ -9,14 +9,18 @@ Serializers serve two main purposes:
 
 I used ModelSerializer to automatically generate fields based on model definitions,
 reducing boilerplate code while maintaining full control over field behavior.
+The catalog and user serializers report their time to the Server-Timing
+middleware (TimedSerializerMixin, see timing.py).
 """
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Product, Category
+from .sparse import SparseFieldsSerializerMixin
+from .timing import TimedSerializerMixin
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Week 2: Serializer for Category model.
     
@@ -28,7 +32,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'  # Includes: id, name, slug
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Week 2: Serializer for Django's built-in User model.
     
@@ -81,7 +85,7 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Week 2: Serializer for Product model with nested category.
     
@@ -109,14 +113,23 @@ class ProductSerializer(serializers.ModelSerializer):
         "name": "iPhone 15",
         "description": "Latest Apple smartphone",
         "price": "999.99",
-        "category": {"id": 1, "name": "Electronics", "slug": "electronics"},
+        "category": 1,
         "stock_quantity": 50,
         "created_by": "admin",
         "created_at": "2024-01-15T10:30:00Z"
     }
+    
+    Responses can be trimmed with fields=/omit= and the category expanded
+    to {"id": 1, "name": "Electronics", "slug": "electronics", ...} with
+    expand=['category'] (the ?fields=, ?omit=, ?expand= parameters, see sparse.py).
     """
-    # Nested serializer for rich GET responses
+    # Nested serializer for rich GET responses (?expand=category, otherwise just the id)
     category = CategorySerializer(read_only=True)
+    expandable_fields = {
+        'category': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+    }
+    # str(user) is the username; only that column is needed
+    column_sources = {'created_by': ['created_by__username']}
     
     # Integer field for POST/PUT - references Category.id
     category_id = serializers.IntegerField(write_only=True)
@@ -129,4 +142,30 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ReservationSerializer(serializers.Serializer):
+    """
+    Request body for POST /api/products/{id}/reserve/: {"quantity": 2}
+    (quantity defaults to 1).
+    """
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CartItemSerializer(ReservationSerializer):
+    id = serializers.IntegerField()
+
+
+class CartReservationSerializer(serializers.Serializer):
+    """
+    Request body for POST /api/products/reserve/:
+    {"items": [{"id": 1, "quantity": 2}, {"id": 7, "quantity": 1}]}
+    """
+    items = CartItemSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate_items(self, items):
+        # The same product twice in one cart counts once, with the quantities added
+        quantities = {}
+        for item in items:
+            quantities[item['id']] = quantities.get(item['id'], 0) + item['quantity']
+        return quantities
@@ -0,0 +1,68 @@
+"""
+Signal handlers for the products app
+------------------------------------
+Any change to a product or category - or to the username shown as a
+product's created_by - moves the catalog to a new cache version, so cached
+responses (cache.py) are never served stale.
+
+Deleting a token (logout) or deleting/deactivating a user drops the
+affected entries from the authentication token cache (authentication.py).
+
+After migrations, the SQLite full-text sync triggers are checked and put back
+if a table rebuild dropped them (search.py). Connected in apps.py.
+"""
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import bump_revocation_generation, token_cache
+from .cache import bump_catalog_version
+from .models import Category, Product
+from .search import ensure_sqlite_search_triggers
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_catalog_on_rename(sender, created=False, update_fields=None, **kwargs):
+    # New users own no products yet, and logins save last_login only;
+    # don't flush the catalog for either
+    if created:
+        return
+    if update_fields is None or 'username' in update_fields:
+        bump_catalog_version()
+
+
+@receiver(post_delete, sender=Token)
+def revoke_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate_key(instance.key)
+    bump_revocation_generation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_cached_user(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    token_cache.invalidate_user(instance.pk)
+    # Other processes only need to drop their entries when access is lost
+    if kwargs.get('signal') is post_delete or not instance.is_active:
+        bump_revocation_generation()
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using='default', **kwargs):
+    if sender.name != 'products':
+        return
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        ensure_sqlite_search_triggers(connection)
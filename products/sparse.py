@@ -0,0 +1,150 @@
+"""
+Sparse fieldsets and field expansion
+------------------------------------
+Product responses used to carry every column - including the unbounded
+description and the nested category - even when the client (e.g. the grid in
+templates/index.html) needs a handful of fields. Three query parameters let
+clients ask for less, on products, product search and users:
+
+- ?fields=id,name,price      -> only these keys
+- ?omit=description          -> everything except these keys
+- ?expand=category           -> nested category object instead of its id
+
+`category` is the category's id unless expanded. Unknown names are a 400.
+
+Trimming applies to the SQL as well as the JSON: detail and user queries use
+.only() for the columns the kept fields need (plus anything the view itself
+reads, like validator timestamps), and product lists select just those
+columns with .values() (row_serializers.py).
+"""
+
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+EXPAND_PARAM = 'expand'
+
+
+def query_list(request, name):
+    """A comma-separated query parameter as a list, or None if absent."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def sparse_options(request, serializer_class):
+    """
+    Read ?fields= / ?omit= / ?expand= and check every name against
+    serializer_class. Returns kwargs for the serializer (and row serializers).
+    """
+    if request is None:
+        return {}
+    options = {
+        'fields': query_list(request, FIELDS_PARAM),
+        'omit': query_list(request, OMIT_PARAM) or [],
+        'expand': query_list(request, EXPAND_PARAM) or [],
+    }
+    readable = serializer_class.readable_field_names()
+    expandable = set(serializer_class.expandable_fields)
+    for param in (FIELDS_PARAM, OMIT_PARAM):
+        unknown = sorted(set(options[param] or ()) - readable)
+        if unknown:
+            raise ParseError(f'Unknown field(s) in ?{param}=: {", ".join(unknown)}')
+    unknown = sorted(set(options['expand']) - expandable)
+    if unknown:
+        raise ParseError(f'Cannot expand: {", ".join(unknown)}')
+    return options
+
+
+def orm_path(source):
+    return source.replace('.', LOOKUP_SEP)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    ModelSerializer mixin accepting fields=, omit= and expand= keyword arguments.
+
+    expandable_fields maps a field name to a factory for its collapsed form
+    (used unless the name is in expand). column_sources overrides the model
+    columns a field needs when its source alone doesn't say (e.g. a
+    StringRelatedField that renders the username).
+    """
+    expandable_fields = {}
+    column_sources = {}
+
+    def __init__(self, *args, fields=None, omit=(), expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, collapsed in self.expandable_fields.items():
+            if name not in expand:
+                self.fields[name] = collapsed()
+        for name in list(self.fields):
+            if self.fields[name].write_only:
+                continue  # trimming is about output; writes still accept them
+            if (fields is not None and name not in fields) or name in omit:
+                self.fields.pop(name)
+
+    @classmethod
+    def readable_field_names(cls):
+        return {name for name, field in cls().fields.items() if not field.write_only}
+
+    def required_columns(self):
+        """Model columns (ORM paths) the kept readable fields read."""
+        columns = []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in self.column_sources:
+                columns.extend(self.column_sources[name])
+            elif isinstance(field, serializers.BaseSerializer):
+                columns.extend(
+                    f'{orm_path(field.source)}{LOOKUP_SEP}{orm_path(child.source)}'
+                    for child in field.fields.values()
+                    if not child.write_only
+                )
+            elif field.source != '*':
+                columns.append(orm_path(field.source))
+        return columns
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin: pass the ?fields= / ?omit= / ?expand= options to the
+    serializer, and load only the needed columns for list and retrieve.
+
+    Views that read other columns themselves list them in validator_fields
+    (ConditionalGetMixin) so they are never deferred.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def sparse_options(self):
+        if not hasattr(self, '_sparse_options'):
+            self._sparse_options = sparse_options(self.request, self.get_serializer_class())
+        return self._sparse_options
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.sparse_options())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_actions:
+            return queryset
+        serializer = self.get_serializer_class()(**self.sparse_options())
+        columns = set(serializer.required_columns())
+        columns.update(getattr(self, 'validator_fields', ()))
+        # Cursor pages read the ordering column off each row
+        columns.update(
+            field.lstrip('-') for field in queryset.query.order_by if isinstance(field, str)
+        )
+        model = queryset.model
+        local = {field.name for field in model._meta.concrete_fields}
+        columns = {
+            column for column in columns
+            if column.split(LOOKUP_SEP)[0] in local and column != 'pk'
+        }
+        # Only follow the relations whose columns are still wanted
+        relations = sorted({column.split(LOOKUP_SEP)[0] for column in columns if LOOKUP_SEP in column})
+        return queryset.select_related(None).select_related(*relations).only(*columns)
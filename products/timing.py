@@ -0,0 +1,109 @@
+"""
+Per-request performance timings
+-------------------------------
+State and helpers behind ecommerce_api.middleware.ServerTimingMiddleware.
+For a sampled request it records:
+
+- db: number of SQL statements and their total time, on every database
+  alias (connection.execute_wrapper), plus the slowest statement
+- serialize: time in serializers - TimedSerializerMixin on the DRF
+  serializers and measure('serialize') around the row serializers
+- render: time spent rendering the response (JSON, CSV, templates)
+
+The middleware turns them into a Server-Timing header and a JSON log line
+(logger 'products.timing'). Requests slower than SERVER_TIMING_SLOW_MS also
+log every SQL statement they ran.
+
+Outside a sampled request current() is None and every helper returns at
+once, so unsampled requests pay for one context variable lookup per hook.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Statements kept for the slow-request trace; a bulk import can run thousands
+MAX_TRACE = 200
+
+
+class RequestTimings:
+    """Accumulated timings (seconds) for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.slowest = (0.0, None)  # (duration, sql)
+        self.trace = []             # (alias, duration, sql), up to MAX_TRACE
+        self.phases = {}            # 'serialize' / 'render' -> seconds
+        self.depth = {}             # open measure() blocks per phase
+
+    def add_query(self, alias, sql, duration):
+        self.queries += 1
+        self.db += duration
+        if duration > self.slowest[0]:
+            self.slowest = (duration, sql)
+        if len(self.trace) < MAX_TRACE:
+            self.trace.append((alias, duration, sql))
+
+    def add(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+
+_current = ContextVar('request_timings', default=None)
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def measure(phase):
+    """Add the time spent in the block to `phase`; nested blocks of the same phase count once."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    depth = timings.depth.get(phase, 0)
+    timings.depth[phase] = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.depth[phase] = depth
+        if depth == 0:
+            timings.add(phase, time.perf_counter() - started)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() callable feeding RequestTimings."""
+
+    def __init__(self, timings, alias):
+        self.timings = timings
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings.add_query(self.alias, sql, time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """DRF serializer mixin: time to_representation() as the 'serialize' phase."""
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with measure('serialize'):
+            return super().to_representation(instance)
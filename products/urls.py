@@ -9,6 +9,11 @@ The router creates standard CRUD endpoints following REST conventions.
 Week 3 additions:
 - /api/users/login/  - Token authentication login
 - /api/users/logout/ - Token invalidation logout
+
+Query budgets:
+Every named route below also declares the maximum number of SQL queries a
+request to it may run (QUERY_BUDGETS). products/tests.py hits each route and
+fails if a change goes over budget or adds a route without one.
 """
 
 from django.urls import path, include
@@ -45,4 +50,26 @@ urlpatterns = [
     
     # Include all router-generated URLs
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+# Maximum SQL queries per request, keyed by URL name and HTTP method.
+# Authenticated requests include the token lookup (1 query).
+# List budgets must not depend on page size - use select_related() instead.
+QUERY_BUDGETS = {
+    'api-root': {'GET': 0},
+    'product-list': {'GET': 2, 'POST': 3},       # count + page / token + insert + category
+    'product-detail': {'GET': 1, 'PATCH': 3, 'DELETE': 3},
+    'product-bulk': {'POST': 5, 'PATCH': 7, 'DELETE': 6},  # per chunk of 500, not per item
+    'product-reserve': {'POST': 5},              # savepoint + lock + conditional update + read back + release
+    'product-reserve-batch': {'POST': 5},        # the same for a whole cart
+    'product-facets': {'GET': 1},                # one GROUP BY with conditional counts
+    'product-export': {'GET': 1},                # one streamed query, any catalog size
+    'product-search': {'GET': 1},                # page with windowed count
+    'category-list': {'GET': 2},
+    'category-detail': {'GET': 1},
+    'user-list': {'GET': 2},
+    'user-detail': {'GET': 1},
+    'user-register': {'POST': 3},                # uniqueness check + insert user + insert token
+    'user-login': {'POST': 1},                   # user JOIN token (first login adds an insert)
+    'user-logout': {'POST': 2},                  # token lookup + delete
+}
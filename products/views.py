@@ -8,24 +8,49 @@ This module contains all the ViewSets and API views for:
 - User registration endpoint (with auto token generation - Week 3)
 - Product search functionality
 - Token authentication login/logout (Week 3)
+  (registration and login are async views, see hashing.py)
 - Frontend UI view
+- Prometheus scrape endpoint (/metrics, see metrics.py)
 
 I used Django REST Framework's ViewSets to reduce boilerplate code
 and provide consistent API behavior across all endpoints.
 """
 
+import hmac
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, filters, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from rest_framework.utils.encoders import JSONEncoder
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
-from django.db.models import Q
-from django.shortcuts import render
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Product, Category
-from .serializers import ProductSerializer, CategorySerializer, UserSerializer
+from .serializers import (
+    ProductSerializer, CategorySerializer, UserSerializer,
+    ReservationSerializer, CartReservationSerializer,
+)
+from .pagination import CatalogPagination, SearchPagination
+from .search import ProductSearchFilter, get_search_backend
+from .export import streaming_export
+from .frontend import bootstrap_response, shell_response
+from .facets import cached_facet_counts
+from .inventory import InsufficientStock, ReservationBusy, UnknownProducts, reserve_stock
+from .renderers import CSVRenderer, NDJSONRenderer
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .hashing import acheck_credentials, ahash_password, token_for
+from .row_serializers import ProductRowSerializer, RowSerializerListMixin
+from .sparse import SparseFieldsMixin, sparse_options
+from .replicas import ReplicaReadsMixin, read_from_replicas
+from . import bulk, metrics
 
 
 # FRONTEND VIEW
@@ -34,15 +59,59 @@ from .serializers import ProductSerializer, CategorySerializer, UserSerializer
 def index_view(request):
     """
     Serve the frontend UI at the root URL.
+
+    The page is rendered once per deploy and holds no catalog data, so
+    browsers and CDNs can keep it for a long time (see frontend.py).
+    """
+    return shell_response(request)
+
+
+@require_GET
+def bootstrap_view(request):
     """
-    return render(request, 'index.html')
+    The first product page and the categories in one short-lived JSON
+    document, preloaded by the frontend page (see frontend.py).
+    """
+    return bootstrap_response(request)
+
+
+# METRICS
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint: GET /metrics
+
+    404 when metrics are off (METRICS_ENABLED or no prometheus_client), 401
+    without "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+    """
+    if not metrics.available():
+        raise Http404('Metrics are not enabled.')
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode()):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    body, content_type = metrics.exposition()
+    return HttpResponse(body, content_type=content_type)
 
 
 
 # PRODUCT VIEWS
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+def reservation_busy():
+    """503 for a reservation that couldn't get the database's write lock in time (SQLite)."""
+    response = Response(
+        {'detail': 'Too many concurrent reservations, try again.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+class ProductViewSet(ReplicaReadsMixin, CachedResponseMixin, ConditionalGetMixin, RowSerializerListMixin,
+                     SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Week 2: Full CRUD for products with search, filter, and ordering support.
     
@@ -55,16 +124,58 @@ class ProductViewSet(viewsets.ModelViewSet):
     - DELETE /api/products/{id}/     -> delete a product (auth required)
     
     Search & Filter:
-    - /api/products/?search=keyword  -> search by name, description, or category
+    - /api/products/?search=keyword  -> full-text search by name, description, or category
+                                        (best matches first, see search.py)
     - /api/products/?category__slug=electronics -> filter by category
     - /api/products/?ordering=price  -> order by price (use -price for descending)
+    
+    Sparse fields (see sparse.py):
+    - /api/products/?fields=id,name,price -> only these keys (and only these columns)
+    - /api/products/?omit=description     -> everything else
+    - /api/products/?expand=category      -> nested category object instead of its id
+    
+    Pagination:
+    - /api/products/?page=2               -> classic page numbers (default)
+    - /api/products/?pagination=cursor    -> keyset pages, follow the "next" link
+    
+    The list is serialized by ProductRowSerializer (same JSON, no per-row
+    model instances or DRF fields, see row_serializers.py).
+    
+    Caching: anonymous list/detail responses are cached until the next product
+    or category change (see cache.py), and carry an ETag (details also
+    Last-Modified) so clients can revalidate with a 304 (see conditional.py).
+    
+    Replicas: GET requests read from DATABASE_REPLICA_URLS when configured;
+    writes, reservations and authentication use the primary (see replicas.py).
+    
+    Export (takes the same filter, search and ordering parameters):
+    - GET /api/products/export/?format=ndjson -> whole catalog, one JSON object per line
+    - GET /api/products/export/?format=csv    -> whole catalog as CSV
+    
+    Facets (same filter and search parameters, see facets.py):
+    - GET /api/products/facets/ -> counts per category, price band and stock status
+    
+    Stock reservation (auth required, never oversells, see inventory.py):
+    - POST /api/products/{id}/reserve/ {"quantity": 2}
+    - POST /api/products/reserve/      {"items": [{"id": 1, "quantity": 2}, ...]}  (all or nothing)
+    
+    Bulk writes (auth required, see bulk.py):
+    - POST   /api/products/bulk/  -> create a list of products
+    - PATCH  /api/products/bulk/  -> partially update a list of {"id": ..., ...}
+    - DELETE /api/products/bulk/  -> delete a list of ids
     """
-    queryset = Product.objects.all().order_by('-created_at')
+    # select_related() pulls the category and creator in the same query as the
+    # products, so a page costs the same number of queries whatever its size
+    queryset = Product.objects.select_related('category', 'created_by').order_by('-created_at')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = CatalogPagination
+    # Nested category data changes the payload too, and so does a creator rename
+    validator_fields = ('updated_at', 'category__updated_at')
+    validator_values = ('created_by__username',)
     
     # Week 2: Adding filter backends for search and ordering functionality
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category__slug', 'price', 'stock_quantity']
     search_fields = ['name', 'description', 'category__name']
     ordering_fields = ['price', 'created_at', 'name']
@@ -76,10 +187,129 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the filtered catalog as NDJSON (default) or CSV.
+        
+        Feed jobs should use this instead of crawling ?page=N: one request,
+        no COUNT(*), and constant server memory (see export.py).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(queryset, request.accepted_renderer.format)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request, *args, **kwargs):
+        """
+        Sidebar counts for the products the current filters/search match.
+        
+        One aggregate query, cached until the catalog changes:
+        {"count": 42,
+         "categories": [{"id": 1, "name": "Electronics", "slug": "electronics", "count": 30}, ...],
+         "price_bands": [{"min": "0", "max": "25", "count": 12}, ..., {"min": "1000", "max": null, "count": 1}],
+         "stock": {"in_stock": 40, "out_of_stock": 2}}
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(cached_facet_counts(request, queryset))
+
+    @action(detail=True, methods=['post'])
+    def reserve(self, request, pk=None):
+        """
+        Atomically take `quantity` units of one product's stock.
+        
+        Returns 200 {"id", "reserved", "stock_quantity"} with the stock left,
+        409 with the current stock_quantity if there isn't enough, 404 if the
+        product doesn't exist, 503 with Retry-After if SQLite stayed locked.
+        """
+        serializer = ReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
+        try:
+            pk = int(pk)
+            remaining = reserve_stock({pk: quantity})
+        except (ValueError, UnknownProducts):
+            raise NotFound()
+        except ReservationBusy:
+            return reservation_busy()
+        except InsufficientStock as error:
+            return Response({
+                'detail': 'Insufficient stock.',
+                'stock_quantity': error.products.get(pk),
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({'id': pk, 'reserved': quantity, 'stock_quantity': remaining[pk]})
+
+    @action(detail=False, methods=['post'], url_path='reserve', url_name='reserve-batch')
+    def reserve_batch(self, request, *args, **kwargs):
+        """
+        Reserve a whole cart in one transaction: every item or none.
+        
+        Returns 200 {"items": [{"id", "reserved", "stock_quantity"}, ...]}, or
+        409 {"detail", "available": {"<id>": stock}} naming the short products
+        (404 likewise for unknown ids), with no stock taken. 503 with
+        Retry-After if SQLite stayed locked.
+        """
+        serializer = CartReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantities = serializer.validated_data['items']
+        try:
+            remaining = reserve_stock(quantities)
+        except UnknownProducts as error:
+            return Response({
+                'detail': 'Unknown products.', 'missing': sorted(error.products),
+            }, status=status.HTTP_404_NOT_FOUND)
+        except ReservationBusy:
+            return reservation_busy()
+        except InsufficientStock as error:
+            return Response({
+                'detail': 'Insufficient stock.',
+                'available': {str(pk): stock for pk, stock in error.products.items()},
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({'items': [
+            {'id': pk, 'reserved': quantity, 'stock_quantity': remaining[pk]}
+            for pk, quantity in quantities.items()
+        ]})
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, update or delete many products in one request.
+        
+        The response lists every item by its position in the request, so the
+        caller can retry just the failures:
+        {"succeeded": 2, "failed": 1, "results": [
+            {"index": 0, "status": "created", "id": 41},
+            {"index": 1, "status": "error", "errors": {"price": ["..."]}},
+            {"index": 2, "status": "created", "id": 42}]}
+        """
+        items = request.data
+        if request.method == 'DELETE' and isinstance(items, dict):
+            items = items.get('ids')
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > bulk.MAX_ITEMS:
+            return Response(
+                {'detail': f'At most {bulk.MAX_ITEMS} items per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        context = self.get_serializer_context()
+        if request.method == 'POST':
+            succeeded, errors = bulk.create_products(items, request.user, context)
+            report, ok_status = bulk.bulk_report(succeeded, errors, 'created'), status.HTTP_201_CREATED
+        elif request.method == 'PATCH':
+            succeeded, errors = bulk.update_products(items, context)
+            report, ok_status = bulk.bulk_report(succeeded, errors, 'updated'), status.HTTP_200_OK
+        else:
+            succeeded, errors = bulk.delete_products(items)
+            report, ok_status = bulk.bulk_report(succeeded, errors, 'deleted'), status.HTTP_200_OK
+        # Partial success is still success; only a batch where nothing
+        # could be written is a client error
+        return Response(report, status=ok_status if succeeded else status.HTTP_400_BAD_REQUEST)
+
 # CATEGORY VIEWS
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ReplicaReadsMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Week 2: Read-only access to product categories.
     
@@ -89,16 +319,19 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     
     Note: I used ReadOnlyModelViewSet because categories should be managed
     through the admin panel, not through the public API.
+    Responses are cached and support conditional GETs just like products,
+    and reads go to the replicas when there are any (replicas.py).
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.all().order_by('id')
     serializer_class = CategorySerializer
+    pagination_class = CatalogPagination
 
 
 
 # USER VIEWS
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Week 2: CRUD operations for user management.
     
@@ -109,15 +342,38 @@ class UserViewSet(viewsets.ModelViewSet):
     - DELETE /api/users/{id}/     -> delete user (auth required)
     
     Note: For new user registration, use the /api/users/register/ endpoint instead.
+    Supports the same opt-in cursor pagination as products (?pagination=cursor)
+    and ?fields= / ?omit= (see sparse.py).
     """
     queryset = User.objects.all().order_by('-date_joined')
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = CatalogPagination
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def register_user(request):
+def read_payload(request):
+    """
+    Form fields or a JSON object from the request body, like DRF's request.data.
+    Raises ValueError for malformed JSON.
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        return data
+    return request.POST
+
+
+def api_response(data, status=status.HTTP_200_OK):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def parse_error(error):
+    return api_response({'detail': f'JSON parse error - {error}'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@require_POST
+async def register_user(request):
     """
     Week 2-3: Public endpoint for user self-registration.
     
@@ -136,28 +392,46 @@ def register_user(request):
     
     Week 3: I updated this to automatically create and return an auth token
     so users can immediately start making authenticated requests after registration.
+    
+    This is an async view: the password is hashed in the hashing pool (see
+    hashing.py), so the worker keeps serving other requests meanwhile.
     """
-    serializer = UserSerializer(data=request.data)
-    if serializer.is_valid():
-        user = serializer.save()
-        
-        # Week 3: Create auth token for the new user
-        token, created = Token.objects.get_or_create(user=user)
-        
-        # Return user data with token
-        return Response({
-            'user': serializer.data,
-            'token': token.key,
-            'message': 'Registration successful! Use this token in the Authorization header.'
-        }, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        payload = read_payload(request)
+    except ValueError as error:
+        return parse_error(error)
+    
+    serializer = UserSerializer(data=payload)
+    # Validation checks the username is free, so it runs on the database thread
+    if not await sync_to_async(serializer.is_valid)():
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Same result as UserSerializer.create(), minus the inline set_password()
+    fields = dict(serializer.validated_data)
+    password = fields.pop('password')
+    user = User(**fields)
+    user.password = await ahash_password(password)
+    
+    def save_with_token():
+        user.save()
+        # Week 3: Create auth token for the new user (a brand-new user can't
+        # have one yet, so a plain INSERT replaces get_or_create)
+        return Token.objects.create(user=user)
+    
+    token = await sync_to_async(save_with_token)()
+    
+    # Return user data with token
+    return api_response({
+        'user': UserSerializer(user).data,
+        'token': token.key,
+        'message': 'Registration successful! Use this token in the Authorization header.'
+    }, status=status.HTTP_201_CREATED)
 
 
 # AUTHENTICATION ENDPOINTS (Week 3)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def user_login(request):
+@require_POST
+async def user_login(request):
     """
     Week 3: Login endpoint that returns an authentication token.
     
@@ -176,24 +450,32 @@ def user_login(request):
     How to use the token:
     Include it in the Authorization header of subsequent requests:
     Authorization: Token <your-token-here>
+    
+    Async like register_user: one query loads the user together with their
+    token, and the password check runs in the hashing pool.
     """
-    username = request.data.get('username')
-    password = request.data.get('password')
+    try:
+        payload = read_payload(request)
+    except ValueError as error:
+        return parse_error(error)
+    username = payload.get('username')
+    password = payload.get('password')
     
     # Validate that both fields are provided
     if not username or not password:
-        return Response({
+        return api_response({
             'error': 'Please provide both username and password'
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Authenticate the user
-    user = authenticate(username=username, password=password)
+    user = await acheck_credentials(request, username, password)
+    metrics.record_auth('login', user is not None)
     
     if user:
-        # Get or create token for this user
-        token, created = Token.objects.get_or_create(user=user)
+        # Existing token comes from the login query; only first logins insert
+        token = await sync_to_async(token_for)(user)
         
-        return Response({
+        return api_response({
             'token': token.key,
             'user_id': user.id,
             'username': user.username,
@@ -201,11 +483,44 @@ def user_login(request):
             'message': 'Login successful!'
         }, status=status.HTTP_200_OK)
     else:
-        return Response({
+        return api_response({
             'error': 'Invalid credentials. Please check username and password.'
         }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@require_POST
+async def obtain_auth_token(request):
+    """
+    Week 3: Async replacement for DRF's obtain_auth_token.
+    
+    Endpoint: POST /api/api-token-auth/
+    
+    Same request and responses as the DRF view: {"token": "<key>"} on success,
+    400 with field or non_field_errors otherwise.
+    """
+    try:
+        payload = read_payload(request)
+    except ValueError as error:
+        return parse_error(error)
+    
+    errors = {
+        field: ['This field is required.']
+        for field in ('username', 'password')
+        if not payload.get(field)
+    }
+    if errors:
+        return api_response(errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = await acheck_credentials(request, payload['username'], payload['password'])
+    metrics.record_auth('api-token', user is not None)
+    if not user:
+        return api_response({
+            'non_field_errors': ['Unable to log in with provided credentials.']
+        }, status=status.HTTP_400_BAD_REQUEST)
+    token = await sync_to_async(token_for)(user)
+    return api_response({'token': token.key})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def user_logout(request):
@@ -244,36 +559,43 @@ def search_products(request):
     Endpoint: GET /api/products/search/
     
     Query Parameters:
-    - name: Search term to match against product name (partial match)
+    - name: Words to find in the product name (full-text, prefix match)
     - category: Search term to match against category name (partial match)
+    - page / page_size: Pagination (page_size up to 100, first 1000 hits only)
+    - fields / omit / expand: Trim or expand each result, as on /api/products/
     
     Examples:
     - /api/products/search/?name=laptop
     - /api/products/search/?category=electronics
     - /api/products/search/?name=phone&category=mobile
     
-    Returns: List of matching products
+    Returns: A page of matching products, best name matches first, with the
+    total count and next/previous links (same shape as /api/products/)
     """
+    # Authentication is done; the rest is catalog reads (replicas.py)
+    read_from_replicas()
+
     # Get query parameters
     name_query = request.query_params.get('name', '')
     category_query = request.query_params.get('category', '')
     
-    # Start with all products
-    products = Product.objects.all()
-    
-    # Apply filters using Q objects for flexible querying
-    if name_query:
-        products = products.filter(Q(name__icontains=name_query))
+    # Start with all products (category and creator joined in, see ProductViewSet)
+    products = Product.objects.select_related('category', 'created_by').order_by('-created_at')
     
+    # Category names live in a small table, so match them there and let the
+    # product side use its category index
     if category_query:
-        products = products.filter(Q(category__name__icontains=category_query))
-    
-    # Order results by relevance (newest first)
-    products = products.order_by('-created_at')
+        products = products.filter(
+            category__in=Category.objects.filter(name__icontains=category_query)
+        )
     
-    # Serialize and return results
-    serializer = ProductSerializer(products, many=True)
-    return Response({
-        'count': products.count(),
-        'results': serializer.data
-    })
+    # Name matching goes through the full-text index and orders by relevance
+    if name_query:
+        products = get_search_backend(products.db).search(products, name_query, fields=['name'])
+    
+    # Serialize one bounded page; the total count comes back with the rows.
+    # Same fast read path as the product list (see row_serializers.py)
+    rows = ProductRowSerializer(**sparse_options(request, ProductSerializer))
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(rows.prepare(products), request)
+    return paginator.get_paginated_response(rows.serialize(page))